@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Benchmarks for Invenio-Records-Permissions.
+
+They run against an in-memory SQLite database. Each module can be run on its
+own, e.g.::
+
+    python -m benchmarks.bench_needs
+
+and prints its results as JSON. ``python -m benchmarks`` runs all of them and
+can compare the results with a previous run to catch regressions.
+"""
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Run the benchmarks and optionally compare them with a previous run.
+
+.. code-block:: console
+
+    $ python -m benchmarks --output baseline.json
+    $ python -m benchmarks --compare baseline.json --threshold 1.25
+
+The comparison exits with status 1 if a timing got slower (or a throughput
+lower, or a memory usage higher) by more than the threshold factor.
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import platform
+import sys
+
+import invenio_records_permissions
+
+BENCHMARKS = [
+    "policy",
+    "filter",
+    "scaling",
+    "needs",
+    "compiled",
+    "memory",
+    "import",
+    "interning",
+    "columnar",
+    "parallel",
+]
+
+
+def _is_metric(key, value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _row_key(row):
+    """Identify a result by its non-metric fields."""
+    return tuple(sorted((k, v) for k, v in row.items() if not _is_metric(k, v)))
+
+
+def compare(baseline, current, threshold):
+    """Regressions of ``current`` compared to ``baseline``."""
+    regressions = []
+    for name, rows in current["benchmarks"].items():
+        previous = {_row_key(r): r for r in baseline["benchmarks"].get(name, [])}
+        for row in rows:
+            before = previous.get(_row_key(row))
+            if before is None:
+                continue
+            for key, value in row.items():
+                old = before.get(key)
+                if not _is_metric(key, value) or not old or not value:
+                    continue
+                if key.endswith("per_second"):
+                    ratio = old / value
+                elif key.endswith("seconds") or key.startswith("bytes"):
+                    ratio = value / old
+                else:
+                    continue
+                if ratio > threshold:
+                    regressions.append(
+                        {
+                            "benchmark": name,
+                            "result": dict(_row_key(row)),
+                            "metric": key,
+                            "baseline": old,
+                            "current": value,
+                            "ratio": ratio,
+                        }
+                    )
+    return regressions
+
+
+def run(names):
+    """Run the benchmarks ``names``."""
+    results = {
+        "meta": {
+            "date": datetime.datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "version": invenio_records_permissions.__version__,
+        },
+        "benchmarks": {},
+    }
+    for name in names:
+        module = importlib.import_module(".bench_" + name, __package__)
+        results["benchmarks"][name] = module.run()
+    return results
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help="One of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--output", help="File to write the JSON results to.")
+    parser.add_argument("--compare", help="JSON results of a previous run.")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmarks: " + ", ".join(sorted(unknown)))
+
+    results = run(args.names or BENCHMARKS)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.compare:
+        with open(args.compare) as fp:
+            regressions = compare(json.load(fp), results, args.threshold)
+        json.dump({"regressions": regressions}, sys.stderr, indent=2)
+        sys.stderr.write("\n")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
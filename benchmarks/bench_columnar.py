@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Record-by-record versus vectorized ``read`` checks over a batch.
+
+``bulk_can_seconds`` checks the batch with ``RecordPermissionPolicy.bulk_can``,
+``columns_seconds`` runs a first ``columnar.bulk_can``, projecting the batch
+into columns, and ``vectorized_seconds`` checks the projected batch again, as
+for another identity or action reading the same columns. Requires NumPy.
+"""
+
+import time
+
+from flask_principal import Identity, UserNeed
+from invenio_access.permissions import any_user
+
+from invenio_records_permissions.columnar import RecordBatch, bulk_can
+from invenio_records_permissions.policies import RecordPermissionPolicy
+
+from .helpers import add_superusers_role, create_app, report
+
+SIZES = [1000, 100000]
+
+
+def _seconds(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run():
+    """Run the benchmark."""
+    app = create_app()
+    results = []
+    with app.app_context():
+        add_superusers_role()
+        identity = Identity(1)
+        identity.provides.update({any_user, UserNeed(1)})
+        for size in SIZES:
+            records = [
+                {
+                    "owners": [i % 1000, 1000 + i % 7],
+                    "_access": {"metadata_restricted": i % 2 == 0},
+                }
+                for i in range(size)
+            ]
+            bulk_seconds, expected = _seconds(
+                lambda: RecordPermissionPolicy.bulk_can("read", identity, records)
+            )
+            columns_seconds, batch = _seconds(lambda: _columns(records, identity))
+            vectorized_seconds, allowed = _seconds(
+                lambda: bulk_can(RecordPermissionPolicy, "read", identity, batch)
+            )
+            assert allowed.tolist() == expected
+            results.append(
+                {
+                    "records": size,
+                    "bulk_can_seconds": bulk_seconds,
+                    "columns_seconds": columns_seconds,
+                    "vectorized_seconds": vectorized_seconds,
+                }
+            )
+    return results
+
+
+def _columns(records, identity):
+    """Project ``records`` into the columns of the read check."""
+    batch = RecordBatch(records)
+    bulk_can(RecordPermissionPolicy, "read", identity, batch)
+    return batch
+
+
+if __name__ == "__main__":
+    report("columnar", run())
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Latency of compiled versus interpreted checks of RecordPermissionPolicy."""
+
+from cachelib import SimpleCache
+from flask_principal import Identity, UserNeed
+from invenio_access.permissions import any_user, authenticated_user
+
+from invenio_records_permissions.policies import (
+    RecordPermissionPolicy,
+    compile_policy,
+)
+
+from .helpers import add_superusers_role, create_app, report, timeit
+
+ACTIONS = ["search", "read", "update", "delete", "read_files", "update_files"]
+
+
+def run(number=2000):
+    """Run the benchmark."""
+    app = create_app(ACCESS_CACHE=SimpleCache())
+    results = []
+    with app.app_context():
+        add_superusers_role()
+        identity = Identity(1)
+        identity.provides.update({any_user, authenticated_user, UserNeed(1)})
+        records = {
+            "public": {"owners": [2], "_access": {"metadata_restricted": False}},
+            "restricted": {"owners": [1], "_access": {"metadata_restricted": True}},
+        }
+        compiled = compile_policy(RecordPermissionPolicy)
+
+        for action in ACTIONS:
+            for name, record in records.items():
+                interpreted = timeit(
+                    lambda: RecordPermissionPolicy(action, record=record).allows(
+                        identity
+                    ),
+                    number,
+                )
+                check = compiled[action]
+                compiled_ = timeit(lambda: check(identity, record=record), number)
+                results.append(
+                    {
+                        "action": action,
+                        "record": name,
+                        "interpreted_seconds": interpreted,
+                        "compiled_seconds": compiled_,
+                        "speedup": interpreted / compiled_,
+                    }
+                )
+    return results
+
+
+if __name__ == "__main__":
+    report("compiled", run())
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Construction time and size of the search permission filters."""
+
+import json
+
+from flask_principal import Identity, RoleNeed, UserNeed
+from invenio_access.permissions import any_user, authenticated_user
+
+from invenio_records_permissions.api import permission_filter
+from invenio_records_permissions.generators import (
+    AllowedByAccessLevel,
+    AnyUserIfPublic,
+    AuthenticatedUser,
+    RecordOwners,
+)
+from invenio_records_permissions.policies import RecordPermissionPolicy
+
+from .helpers import add_superusers_role, create_app, report, timeit
+
+
+class SearchPolicy(RecordPermissionPolicy):
+    """Policy with a typical set of search filters."""
+
+    can_read = [AnyUserIfPublic(), RecordOwners(), AllowedByAccessLevel()]
+    can_search_authenticated = [AuthenticatedUser(), RecordOwners()]
+
+
+def _identities(superusers):
+    anonymous = Identity(None)
+    anonymous.provides.add(any_user)
+    user = Identity(1)
+    user.provides.update({any_user, authenticated_user, UserNeed(1)})
+    superuser = Identity(2)
+    superuser.provides.update({any_user, authenticated_user, superusers})
+    return {"anonymous": anonymous, "user": user, "superuser": superuser}
+
+
+def run(number=1000):
+    """Run the benchmark."""
+    results = []
+    for cache_size in (0, 1024):
+        app = create_app(RECORDS_PERMISSIONS_FILTER_CACHE_SIZE=cache_size)
+        with app.app_context():
+            superusers = RoleNeed(add_superusers_role().name)
+            for name, identity in _identities(superusers).items():
+                for action in ("read", "search_authenticated"):
+
+                    def _build():
+                        return permission_filter(
+                            SearchPolicy(action, identity=identity)
+                        )
+
+                    results.append(
+                        {
+                            "action": action,
+                            "identity": name,
+                            "cache": bool(cache_size),
+                            "seconds": timeit(_build, number),
+                            "query_bytes": len(json.dumps(_build().to_dict())),
+                        }
+                    )
+    return results
+
+
+if __name__ == "__main__":
+    report("filter", run())
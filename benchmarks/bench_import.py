@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Cold import time of the package, measured with ``python -X importtime``.
+
+Each module is imported in a fresh interpreter ``repeat`` times and the
+fastest cumulative time is kept. ``modules`` is the number of modules the
+import loaded.
+"""
+
+import subprocess
+import sys
+
+MODULES = ["invenio_records_permissions"]
+
+
+def import_times(module):
+    """Cumulative import time in seconds of the modules loaded by ``module``."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def run(repeat=5):
+    """Run the benchmark."""
+    results = []
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(repeat)]
+        results.append(
+            {
+                "module": module,
+                "modules": len(runs[0]),
+                "import_seconds": min(times[module] for times in runs),
+            }
+        )
+    return results
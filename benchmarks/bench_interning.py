@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Needs of ``RecordOwners``, created on each call or interned.
+
+``created_seconds`` builds a ``UserNeed`` per owner as ``RecordOwners`` did,
+``interned_seconds`` calls ``RecordOwners().needs()``, which interns them.
+"""
+
+from flask_principal import UserNeed
+
+from invenio_records_permissions.generators import RecordOwners
+
+from .helpers import report, timeit
+
+OWNERS = [1, 10, 100]
+
+
+def run(number=20000):
+    """Run the benchmark."""
+    results = []
+    generator = RecordOwners()
+    for owners in OWNERS:
+        record = {"owners": list(range(owners))}
+        # Intern the Needs
+        generator.needs(record=record)
+        results.append(
+            {
+                "owners": owners,
+                "created_seconds": timeit(
+                    lambda: [UserNeed(owner) for owner in record.get("owners", [])],
+                    number,
+                ),
+                "interned_seconds": timeit(
+                    lambda: generator.needs(record=record), number
+                ),
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    report("interning", run())
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Memory allocated by policy instances, measured with tracemalloc.
+
+``bytes_per_policy`` is the memory still allocated per policy while
+``number`` of them are alive, after creating them ("created") and after
+checking them once ("checked").
+"""
+
+import gc
+import time
+import tracemalloc
+
+from flask_principal import Identity, UserNeed
+from invenio_access.permissions import any_user
+
+from invenio_records_permissions.policies import RecordPermissionPolicy
+
+from .helpers import add_superusers_role, create_app, report
+
+
+def _allocated(func, number):
+    """Bytes allocated per item by ``func(number)``, and seconds per item."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        items = func(number)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    seconds = time.perf_counter() - start
+    del items
+    return (after - before) / number, seconds / number
+
+
+def run(number=100000):
+    """Run the benchmark."""
+    app = create_app()
+    results = []
+    with app.app_context():
+        add_superusers_role()
+        identity = Identity(1)
+        identity.provides.update({any_user, UserNeed(1)})
+        record = {"owners": [1], "_access": {"metadata_restricted": False}}
+        # Warm up the caches
+        RecordPermissionPolicy(action="read", record=record).allows(identity)
+
+        def _created(number):
+            return [
+                RecordPermissionPolicy(action="read", record=record)
+                for _ in range(number)
+            ]
+
+        def _checked(number):
+            policies = _created(number)
+            for policy in policies:
+                policy.allows(identity)
+            return policies
+
+        for variant, func in (("created", _created), ("checked", _checked)):
+            bytes_per_policy, seconds = _allocated(func, number)
+            results.append(
+                {
+                    "variant": variant,
+                    "policies": number,
+                    "bytes_per_policy": bytes_per_policy,
+                    "traced_seconds_per_policy": seconds,
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    report("memory", run())
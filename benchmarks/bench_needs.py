@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""DB round-trips and latency of repeated ``allows()`` on one policy.
+
+The "recomputed" variant runs the generators and the ActionNeed expansion on
+every access to ``needs``/``excludes``, as policies did before memoization.
+"""
+
+from flask_principal import Identity
+from invenio_access.permissions import any_user
+
+from invenio_records_permissions.policies import RecordPermissionPolicy
+
+from .helpers import add_superusers_role, count_queries, create_app, report, timeit
+
+CHECKS = 5
+
+
+class RecomputingPolicy(RecordPermissionPolicy):
+    """Policy recomputing its needs and excludes on every access."""
+
+    def _load_generators(self):
+        self.invalidate()
+        super()._load_generators()
+
+
+def _checks(policy, identity):
+    for _ in range(CHECKS):
+        policy.allows(identity)
+
+
+def run(number=200):
+    """Run the benchmark."""
+    app = create_app()
+    results = []
+    with app.app_context():
+        add_superusers_role()
+        identity = Identity(1)
+        identity.provides.add(any_user)
+        record = {"owners": [1], "_access": {"metadata_restricted": False}}
+
+        for variant, policy_cls in (
+            ("recomputed", RecomputingPolicy),
+            ("memoized", RecordPermissionPolicy),
+        ):
+            with count_queries() as queries:
+                _checks(policy_cls(action="read", record=record), identity)
+
+            def _run():
+                _checks(policy_cls(action="read", record=record), identity)
+
+            results.append(
+                {
+                    "variant": variant,
+                    "checks_per_policy": CHECKS,
+                    "queries_per_check": len(queries) / CHECKS,
+                    "seconds_per_check": timeit(_run, number) / CHECKS,
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    report("needs", run())
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Scaling of ``parallel_bulk_can`` with the number of workers.
+
+The ``read`` permission of ``records`` records is checked on process pools
+of 1 to ``os.cpu_count()`` workers (and a thread pool of as many workers,
+for comparison). ``speedup`` is relative to ``bulk_can`` in the current
+process.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from flask_principal import Identity, UserNeed
+from invenio_access.permissions import any_user
+
+from invenio_records_permissions.parallel import parallel_bulk_can
+from invenio_records_permissions.policies import RecordPermissionPolicy
+
+from .helpers import add_superusers_role, create_app, report
+
+
+def _workers():
+    count = os.cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 <= count:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != count:
+        workers.append(count)
+    return workers
+
+
+def run(records=50000, shard_size=2000):
+    """Run the benchmark."""
+    app = create_app()
+    results = []
+    with app.app_context():
+        add_superusers_role()
+        identity = Identity(1)
+        identity.provides.update({any_user, UserNeed(1)})
+        batch = [
+            {
+                "owners": [i % 1000, 1000 + i % 7],
+                "_access": {"metadata_restricted": i % 2 == 0},
+            }
+            for i in range(records)
+        ]
+
+        start = time.perf_counter()
+        expected = RecordPermissionPolicy.bulk_can("read", identity, batch)
+        serial = time.perf_counter() - start
+
+        for executor_cls in (ProcessPoolExecutor, ThreadPoolExecutor):
+            for workers in _workers():
+                with executor_cls(max_workers=workers) as executor:
+                    # Start the workers
+                    list(executor.map(abs, range(workers)))
+                    start = time.perf_counter()
+                    allowed = parallel_bulk_can(
+                        RecordPermissionPolicy,
+                        "read",
+                        identity,
+                        batch,
+                        executor,
+                        shard_size=shard_size,
+                    )
+                    seconds = time.perf_counter() - start
+                assert allowed == expected
+                results.append(
+                    {
+                        "executor": executor_cls.__name__,
+                        "workers": workers,
+                        "records": records,
+                        "seconds": seconds,
+                        "speedup": serial / seconds,
+                    }
+                )
+    return results
+
+
+if __name__ == "__main__":
+    report("parallel", run())
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Latency per action and throughput over many records of RecordPermissionPolicy."""
+
+import time
+
+from flask_principal import Identity, UserNeed
+from invenio_access.permissions import any_user, authenticated_user
+
+from invenio_records_permissions.policies import RecordPermissionPolicy
+
+from .helpers import add_superusers_role, create_app, report, timeit
+
+ACTIONS = [
+    "search",
+    "create",
+    "read",
+    "update",
+    "delete",
+    "read_files",
+    "update_files",
+]
+
+RECORDS = 10000
+
+
+def _identities():
+    anonymous = Identity(None)
+    anonymous.provides.add(any_user)
+    owner = Identity(1)
+    owner.provides.update({any_user, authenticated_user, UserNeed(1)})
+    return {"anonymous": anonymous, "owner": owner}
+
+
+def _record(i):
+    return {
+        "owners": [1 if i % 2 else 2],
+        "_access": {"metadata_restricted": bool(i % 3)},
+    }
+
+
+def run(number=1000):
+    """Run the benchmark."""
+    app = create_app()
+    results = []
+    with app.app_context():
+        add_superusers_role()
+        record = _record(1)
+
+        for name, identity in _identities().items():
+            for action in ACTIONS:
+                seconds = timeit(
+                    lambda: RecordPermissionPolicy(action, record=record).allows(
+                        identity
+                    ),
+                    number,
+                )
+                results.append(
+                    {
+                        "metric": "latency",
+                        "action": action,
+                        "identity": name,
+                        "seconds": seconds,
+                    }
+                )
+
+            records = [_record(i) for i in range(RECORDS)]
+            start = time.perf_counter()
+            for record_ in records:
+                RecordPermissionPolicy("read", record=record_).allows(identity)
+            per_record = time.perf_counter() - start
+            start = time.perf_counter()
+            RecordPermissionPolicy.bulk_can("read", identity, records)
+            bulk = time.perf_counter() - start
+            results += [
+                {
+                    "metric": "throughput",
+                    "action": "read",
+                    "identity": name,
+                    "variant": variant,
+                    "records": RECORDS,
+                    "records_per_second": RECORDS / seconds,
+                }
+                for variant, seconds in (("per_record", per_record), ("bulk", bulk))
+            ]
+    return results
+
+
+if __name__ == "__main__":
+    report("policy", run())
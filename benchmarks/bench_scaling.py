@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Check latency depending on the number of owners, access levels and grants."""
+
+from flask_principal import ActionNeed, Identity, UserNeed
+from invenio_access.models import ActionRoles, ActionUsers
+from invenio_access.permissions import any_user, authenticated_user
+from invenio_accounts.models import Role, User
+from invenio_db import db
+
+from invenio_records_permissions.generators import AllowedByAccessLevel, RecordOwners
+from invenio_records_permissions.policies import RecordPermissionPolicy
+
+from .helpers import create_app, report, timeit
+
+SIZES = [1, 10, 100, 1000]
+
+
+class ScalingPolicy(RecordPermissionPolicy):
+    """Policy reading the owners and access levels of the records."""
+
+    can_read = [RecordOwners(), AllowedByAccessLevel()]
+
+
+def _restricted_record(owners=(), curators=()):
+    return {
+        "owners": list(owners),
+        "_access": {"metadata_restricted": True},
+        "internal": {
+            "access_levels": {
+                "metadata_curator": [{"scheme": "person", "id": i} for i in curators]
+            }
+        },
+    }
+
+
+def _grant(size, offset):
+    """Grant superuser-access to ``size`` more users and roles."""
+    action = ActionNeed("superuser-access")
+    users = [User(email="user{}@example.org".format(offset + i)) for i in range(size)]
+    roles = [Role(name="role{}".format(offset + i)) for i in range(size)]
+    db.session.add_all(users + roles)
+    db.session.flush()
+    db.session.add_all([ActionUsers.allow(action, user=u) for u in users])
+    db.session.add_all([ActionRoles.allow(action, role=r) for r in roles])
+    db.session.commit()
+
+
+def run(number=200):
+    """Run the benchmark."""
+    app = create_app()
+    results = []
+    with app.app_context():
+        identity = Identity(0)
+        identity.provides.update({any_user, authenticated_user, UserNeed(0)})
+
+        for size in SIZES:
+            # The identity is never found, so that all entries are checked
+            for name, record in (
+                ("owners", _restricted_record(owners=range(1, size + 1))),
+                ("access_levels", _restricted_record(curators=range(1, size + 1))),
+            ):
+                results.append(
+                    {
+                        "dimension": name,
+                        "size": size,
+                        "seconds": timeit(
+                            lambda: ScalingPolicy("read", record=record).allows(
+                                identity
+                            ),
+                            number,
+                        ),
+                    }
+                )
+
+        granted = 0
+        record = _restricted_record()
+        for size in SIZES:
+            _grant(size - granted, granted)
+            granted = size
+            results.append(
+                {
+                    "dimension": "action_grants",
+                    "size": size,
+                    "seconds": timeit(
+                        lambda: ScalingPolicy("read", record=record).allows(identity),
+                        number,
+                    ),
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    report("scaling", run())
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Benchmark helpers."""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+from flask import Flask
+from invenio_access import InvenioAccess
+from invenio_access.models import ActionRoles
+from invenio_access.permissions import superuser_access
+from invenio_accounts import InvenioAccounts
+from invenio_accounts.models import Role
+from invenio_db import InvenioDB, db
+from sqlalchemy import event
+
+from invenio_records_permissions import InvenioRecordsPermissions
+
+
+def create_app(**config):
+    """Create a minimal application backed by an in-memory SQLite database."""
+    app = Flask("benchmarks")
+    app.config.update(
+        SECRET_KEY="benchmarks",
+        SECURITY_PASSWORD_SALT="benchmarks",
+        SQLALCHEMY_DATABASE_URI="sqlite://",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    app.config.update(config)
+    InvenioDB(app, entry_point_group=False)
+    InvenioAccounts(app)
+    InvenioAccess(app)
+    InvenioRecordsPermissions(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def add_superusers_role(name="superusers"):
+    """Grant superuser-access to a new role."""
+    role = Role(name=name)
+    db.session.add(role)
+    db.session.add(ActionRoles.allow(superuser_access, role=role))
+    db.session.commit()
+    return role
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements issued inside the block."""
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def timeit(func, number=1000):
+    """Mean wall-clock seconds of ``number`` calls to ``func``."""
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number
+
+
+def report(name, results, stream=sys.stdout):
+    """Print the results of a benchmark as one JSON document."""
+    json.dump({"benchmark": name, "results": results}, stream, indent=2)
+    stream.write("\n")
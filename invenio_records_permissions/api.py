@@ -9,16 +9,147 @@
 
 """Invenio Records Permissions API."""
 
+import copy
 from functools import reduce
+from itertools import islice
 
-from invenio_search.engine import dsl
+from flask import current_app, has_app_context
+
+from .policies.base import BasePermissionPolicy
+from .search import dsl
+
+_SCALARS = (str, int, float, bool)
+
+FILTER_CHUNK_SIZE = 500
+"""Default number of records checked at once by :func:`filter_allowed`."""
+
+
+def _disjuncts(query):
+    """Clauses of ``query`` if it is a plain disjunction, else ``query``."""
+    if query.name == "bool" and set(query._params) == {"should"}:
+        for clause in query.should:
+            yield from _disjuncts(clause)
+    else:
+        yield query
+
+
+def normalize_query_filters(query_filters):
+    """Simplify the disjunction of ``query_filters`` into one Query.
+
+    - a ``match_all`` filter absorbs the whole disjunction,
+    - ``match_none`` filters (``~Q("match_all")``) are dropped,
+    - duplicated filters are removed,
+    - ``term`` and ``terms`` filters on the same field are merged into one.
+
+    An empty disjunction matches no document.
+    """
+    terms = {}
+    others = []
+    for query in query_filters:
+        for clause in _disjuncts(query):
+            if clause.name == "match_all":
+                return dsl.Q("match_all")
+            if clause.name == "match_none":
+                continue
+            if clause.name in ("term", "terms") and len(clause._params) == 1:
+                ((field, value),) = clause._params.items()
+                values = value if clause.name == "terms" else [value]
+                if all(isinstance(v, _SCALARS) for v in values):
+                    field_values = terms.setdefault(field, {})
+                    for v in values:
+                        # keyed by type so that e.g. 1 and True stay distinct
+                        field_values.setdefault((type(v), v), v)
+                    continue
+            if clause not in others:
+                others.append(clause)
+
+    clauses = []
+    for field, field_values in terms.items():
+        values = list(field_values.values())
+        if len(values) == 1:
+            clauses.append(dsl.Q("term", **{field: values[0]}))
+        else:
+            clauses.append(dsl.Q("terms", **{field: values}))
+    clauses += others
+    if not clauses:
+        return dsl.Q("match_none")
+    return reduce(lambda f1, f2: f1 | f2, clauses)
+
+
+def _filter_cache_key(permission):
+    """Cache key of the filter of ``permission`` or None if not cacheable.
+
+    Only policies over nothing but an identity are cached, as the filter then
+    depends only on the policy, the action and the needs of the identity.
+    """
+    if not isinstance(permission, BasePermissionPolicy):
+        return None
+    identity = permission.over.get("identity")
+    if identity is None or set(permission.over) != {"identity"}:
+        return None
+    return (type(permission), permission.action, frozenset(identity.provides))
 
 
 def permission_filter(permission):
     """Generates the Query that returns visible records from a search.
 
-    Q() is the "match all" Query.
+    Q() is the "match all" Query. The query filters of the permission are
+    simplified with :func:`normalize_query_filters`.
+
+    Filters are cached, see ``RECORDS_PERMISSIONS_FILTER_CACHE_SIZE``.
     """
+    cache = None
+    if has_app_context():
+        ext = current_app.extensions.get("invenio-records-permissions")
+        cache = getattr(ext, "filter_cache", None)
+    key = _filter_cache_key(permission) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return dsl.Q(copy.deepcopy(cached))
+
     query_filters = permission.query_filters if permission is not None else []
     query_filters = query_filters or [dsl.Q()]
-    return reduce(lambda f1, f2: f1 | f2, query_filters)
+    query = normalize_query_filters(query_filters)
+
+    if key is not None:
+        cache.set(key, query.to_dict())
+    return query
+
+
+def filter_allowed(
+    policy_cls, action, identity, records, chunk_size=FILTER_CHUNK_SIZE, **over
+):
+    """Lazily yield the ``records`` over which ``identity`` can do ``action``.
+
+    The records are consumed and checked in chunks of ``chunk_size`` with
+    :meth:`~.policies.base.BasePermissionPolicy.bulk_can`, which expands the
+    ActionNeeds once per chunk. Only one chunk is held in memory, e.g. while
+    streaming the records of a database cursor:
+
+    .. code-block:: python
+
+        records = (Record(m.json, model=m) for m in query.yield_per(500))
+        for record in filter_allowed(policy_cls, "read", identity, records):
+            ...
+
+    The records must be consumed within the application context.
+
+    :param policy_cls: The policy class.
+    :param action: The action to check.
+    :param identity: The identity to check.
+    :param records: Iterable of records, or of their projections on the
+        :meth:`~.policies.base.BasePermissionPolicy.record_paths` of the
+        action.
+    :param chunk_size: Number of records checked at once.
+    :param over: Additional arguments passed to the generators.
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        allowed = policy_cls.bulk_can(action, identity, chunk, **over)
+        for record, record_allowed in zip(chunk, allowed):
+            if record_allowed:
+                yield record
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Invenio Records Permissions caches."""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class MemoryVersion(object):
+    """Version of the action grants, kept in the memory of the process.
+
+    It only invalidates the caches of the current process.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Current version."""
+        return self.value
+
+    def bump(self):
+        """Change the version, invalidating the caches."""
+        with self._lock:
+            self.value += 1
+
+
+class FileVersion(object):
+    """Version of the action grants, shared by the processes through a file.
+
+    All the workers of a host configured with the same path see the bumps of
+    each other. The file holds a random token, replaced atomically on each
+    bump, so that concurrent bumps need no locking. The file is only read
+    again when its inode or modification time change, which costs a
+    ``stat`` per lookup.
+    """
+
+    def __init__(self, path):
+        """Constructor."""
+        self.path = path
+        self._read = None
+
+    def get(self):
+        """Current version, ``None`` if it was never bumped."""
+        try:
+            stat = os.stat(self.path)
+            state = (stat.st_ino, stat.st_mtime_ns)
+            read = self._read
+            if read is not None and read[0] == state:
+                return read[1]
+            with open(self.path) as fp:
+                version = fp.read()
+        except FileNotFoundError:
+            return None
+        self._read = (state, version)
+        return version
+
+    def bump(self):
+        """Change the version, invalidating the caches."""
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=name + ".", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as fp:
+                fp.write(uuid.uuid4().hex)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+class TTLCache(object):
+    """In-process key/value cache whose entries expire after ``ttl`` seconds.
+
+    A ``ttl`` of ``None`` keeps entries until they are deleted or the cache is
+    cleared. If ``maxsize`` is set, the least recently used entries are
+    evicted to keep at most ``maxsize`` entries.
+
+    If a ``version`` (see :class:`MemoryVersion` and :class:`FileVersion`)
+    is given, the cache is cleared whenever the version changes.
+
+    The number of ``hits`` and ``misses`` of :meth:`get` are counted.
+    """
+
+    def __init__(self, ttl=None, maxsize=None, timer=time.monotonic, version=None):
+        """Constructor."""
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.timer = timer
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = version.get() if version is not None else None
+
+    def get(self, key, default=None):
+        """Return the value stored for ``key`` or ``default``."""
+        version = self.version.get() if self.version is not None else None
+        with self._lock:
+            if version != self._version:
+                self._data.clear()
+                self._version = version
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or self.timer() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Store ``value`` for ``key``."""
+        expires_at = self.timer() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove ``key`` from the cache."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Hit and miss counters, and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def __len__(self):
+        """Number of stored (possibly expired) entries."""
+        return len(self._data)
+
+
+def identity_fingerprint(identity):
+    """Digest of the Needs provided by ``identity``, stable across processes.
+
+    It is kept on the identity, with the Needs it was computed from, and
+    recomputed when its provided Needs change.
+    """
+    provides = identity.provides
+    entry = getattr(identity, "_records_permissions_fingerprint", None)
+    if entry is None or entry[0] != provides:
+        needs = "\n".join(sorted(repr(tuple(need)) for need in provides))
+        digest = hashlib.blake2b(needs.encode("utf-8"), digest_size=16).hexdigest()
+        entry = (frozenset(provides), digest)
+        identity._records_permissions_fingerprint = entry
+    return entry[1]
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Vectorized permission checks over batches of records.
+
+Requires NumPy (``pip install invenio-records-permissions[numpy]``).
+
+The records of a :class:`RecordBatch` are projected into columns, computed at
+first use and reused by the checks of every identity and action over the
+batch: boolean arrays (e.g. ``_access.metadata_restricted``) and ragged
+arrays of the Needs of each record (e.g. the owners), stored CSR-style as the
+integer codes of the Needs and the offsets of each record. A check then
+evaluates a whole batch against one identity with array operations:
+
+.. code-block:: python
+
+    batch = RecordBatch(records)
+    readable = bulk_can(RecordPermissionPolicy, "read", identity, batch)
+    files = bulk_can(RecordPermissionPolicy, "read_files", identity, batch)
+
+The record-dependent generators provide the vectorized form of their Needs
+through
+:meth:`~invenio_records_permissions.generators.Generator.needs_mask` and
+:meth:`~invenio_records_permissions.generators.Generator.excludes_mask`. If
+one of the generators of the action does not, the batch is checked record by
+record with
+:meth:`~invenio_records_permissions.policies.base.BasePermissionPolicy.bulk_can`.
+"""
+
+import numpy as np
+
+
+class RaggedNeeds(object):
+    """Needs of each record of a batch, as a ragged array of Need codes."""
+
+    __slots__ = ("batch", "codes", "offsets")
+
+    def __init__(self, batch, codes, offsets):
+        """Constructor.
+
+        :param batch: The :class:`RecordBatch`.
+        :param codes: Codes of the Needs of all the records.
+        :param offsets: Offsets of the codes of each record in ``codes``,
+            ``len(batch) + 1`` of them.
+        """
+        self.batch = batch
+        self.codes = codes
+        self.offsets = offsets
+
+    def nonempty(self):
+        """Whether each record has Needs."""
+        return self.offsets[1:] > self.offsets[:-1]
+
+    def intersects(self, provides):
+        """Whether one of the Needs of each record is in ``provides``."""
+        found = np.isin(self.codes, self.batch.codes_of(provides))
+        counts = np.concatenate(([0], np.cumsum(found)))
+        return counts[self.offsets[1:]] > counts[self.offsets[:-1]]
+
+
+class RecordBatch(object):
+    """Columnar projection of a batch of records."""
+
+    def __init__(self, records):
+        """Constructor.
+
+        :param records: Records, or their projections on the
+            :meth:`~invenio_records_permissions.policies.base.BasePermissionPolicy.record_paths`
+            of the checked actions.
+        """
+        self.records = list(records)
+        self._codes = {}
+        self._columns = {}
+
+    def __len__(self):
+        """Number of records."""
+        return len(self.records)
+
+    def full(self, value):
+        """Boolean array of ``value`` for each record."""
+        return np.full(len(self), value, dtype=bool)
+
+    def flags(self, key, func):
+        """Boolean column ``key`` of ``func(record)`` for each record."""
+        column = self._columns.get(key)
+        if column is None:
+            column = np.fromiter(
+                (bool(func(record)) for record in self.records),
+                dtype=bool,
+                count=len(self),
+            )
+            self._columns[key] = column
+        return column
+
+    def needs(self, key, func):
+        """Ragged column ``key`` of the Needs ``func(record)`` of each record.
+
+        :returns: A :class:`RaggedNeeds`.
+        """
+        column = self._columns.get(key)
+        if column is None:
+            codes = self._codes
+            values, offsets = [], [0]
+            for record in self.records:
+                for need in func(record):
+                    values.append(codes.setdefault(need, len(codes)))
+                offsets.append(len(values))
+            column = RaggedNeeds(
+                self,
+                np.array(values, dtype=np.int64),
+                np.array(offsets, dtype=np.int64),
+            )
+            self._columns[key] = column
+        return column
+
+    def codes_of(self, needs):
+        """Codes of the Needs among ``needs`` held by the batch."""
+        codes = self._codes
+        return np.array([codes[n] for n in needs if n in codes], dtype=np.int64)
+
+
+def bulk_can(policy_cls, action, identity, batch):
+    """Check if ``identity`` can do ``action`` over each record of ``batch``.
+
+    :param policy_cls: The policy class.
+    :param action: The action to check.
+    :param identity: The identity to check.
+    :param batch: A :class:`RecordBatch` or an iterable of records.
+    :returns: A boolean array, one value per record, in input order.
+    """
+    if not isinstance(batch, RecordBatch):
+        batch = RecordBatch(batch)
+    policy = policy_cls(action)
+    policy._expansions = {}
+    compiled = policy._compiled_action(action)
+
+    excluded, allowed, has_needs = compiled.static_check(
+        identity, policy._expand_action
+    )
+    if excluded:
+        return batch.full(False)
+    excluded, allowed, has_needs = (
+        batch.full(False),
+        batch.full(allowed),
+        batch.full(has_needs),
+    )
+    for generator in compiled.generators:
+        excludes = generator.excludes_mask(batch, identity)
+        needs = generator.needs_mask(batch, identity)
+        if excludes is None or needs is None:
+            return np.array(
+                policy_cls.bulk_can(action, identity, batch.records), dtype=bool
+            )
+        excluded |= excludes
+        allowed |= needs[0]
+        has_needs |= needs[1]
+
+    # Without any need, only the ActionNeeds themselves grant permission, see
+    # CompiledAction.allows().
+    action_provided = not compiled.action_needs.isdisjoint(identity.provides)
+    return ~excluded & (allowed | (~has_needs & action_provided))
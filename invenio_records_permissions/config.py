@@ -13,3 +13,110 @@ RECORDS_PERMISSIONS_RECORD_POLICY = (
     "invenio_records_permissions.policies.RecordPermissionPolicy"
 )
 """PermissionPolicy for records."""
+
+RECORDS_PERMISSIONS_POLICIES = {}
+"""Named permission policies, e.g. per record type.
+
+A dict mapping a name to a policy class or its import path:
+
+.. code-block:: python
+
+    RECORDS_PERMISSIONS_POLICIES = {
+        "communities": "my_site.permissions.CommunityPermissionPolicy",
+    }
+
+The policies are imported when the application is created and looked up with
+:func:`~invenio_records_permissions.policies.records.get_permission_policy`.
+The record policy is registered as ``"record"``.
+"""
+
+RECORDS_PERMISSIONS_SUPERUSER_CACHE_TTL = 60
+"""Seconds during which the users/roles allowed for superuser-access are cached.
+
+The cache is also cleared whenever an ``ActionUsers`` or ``ActionRoles`` row
+for the action changes. ``None`` caches them until such a change, ``0``
+disables the cache.
+
+The cache is only enabled if ``RECORDS_PERMISSIONS_GRANTS_VERSION_FILE`` is
+set, so that changing a grant clears the cache of every worker.
+"""
+
+RECORDS_PERMISSIONS_FILTER_CACHE_SIZE = 1024
+"""Number of search permission filters cached by ``permission_filter``.
+
+Filters are cached per policy, action and needs provided by the identity.
+``0`` disables the cache.
+
+The cache is only enabled if ``RECORDS_PERMISSIONS_GRANTS_VERSION_FILE`` is
+set, so that changing a grant clears the cache of every worker.
+"""
+
+RECORDS_PERMISSIONS_FILTER_CACHE_TTL = 60
+"""Seconds during which a search permission filter is cached.
+
+The cache is also cleared on changes of the action grants.
+"""
+
+RECORDS_PERMISSIONS_EXPANSION_CACHE_SIZE = 1024
+"""Number of ActionNeed expansions cached by the policies.
+
+The users and roles an ActionNeed (e.g. ``superuser_access`` or
+``admin-access``) is granted to are cached per process instead of being
+queried for each policy. ``0`` disables the cache.
+
+The cache is only enabled if ``RECORDS_PERMISSIONS_GRANTS_VERSION_FILE`` is
+set, so that changing a grant clears the cache of every worker.
+"""
+
+RECORDS_PERMISSIONS_EXPANSION_CACHE_TTL = 300
+"""Seconds during which an ActionNeed expansion is cached.
+
+The cache is also cleared on changes of the action grants, see
+``RECORDS_PERMISSIONS_GRANTS_VERSION_FILE``.
+"""
+
+RECORDS_PERMISSIONS_GRANTS_VERSION_FILE = None
+"""Path of the file holding the version of the action grants.
+
+The version is changed when a transaction modifying ``ActionUsers``,
+``ActionRoles`` or ``ActionSystemRoles`` is committed, which clears the
+caches depending on the grants. With a file, all the workers of a host
+sharing the path clear their caches; ``None`` keeps the version in memory,
+only clearing the caches of the worker doing the change.
+"""
+
+RECORDS_PERMISSIONS_ACCESS_LEVELS_CACHE_SIZE = 1024
+"""Number of records whose access levels index is cached.
+
+``AllowedByAccessLevel`` indexes the Needs of the access levels of a record
+once per record revision. ``0`` disables the cache.
+"""
+
+RECORDS_PERMISSIONS_DECISION_CACHE_SIZE = 0
+"""Number of permission decisions cached per process.
+
+The decisions of the policies over a record are cached per policy class,
+action, record revision, Needs provided by the identity and version of the
+action grants: a new revision of the record, or a change of the grants, uses
+new entries. Only enable it if the generators of the policies decide on
+these alone (e.g. not on the time or the request). ``0`` disables the cache.
+"""
+
+RECORDS_PERMISSIONS_DECISION_CACHE_TTL = 60
+"""Seconds during which a permission decision is cached."""
+
+RECORDS_PERMISSIONS_DECISION_CACHE = None
+"""Backend of the decision cache (object or import path).
+
+It replaces the in-process cache, e.g. to share the decisions between the
+workers through Redis. It implements ``get(key)``, returning ``None`` for a
+missing key, and ``set(key, value)``; keys are strings and values booleans.
+The backend handles the expiration of the entries.
+"""
+
+RECORDS_PERMISSIONS_TRACER = None
+"""Tracer of the permission evaluation (callable or import path).
+
+It receives the timings and SQL query counts of the policies, see
+:mod:`invenio_records_permissions.tracing`. ``None`` disables tracing.
+"""
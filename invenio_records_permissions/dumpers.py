@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Search dumper extensions."""
+
+from invenio_records.dumpers import SearchDumperExt
+
+from .indexing import PERMISSIONS_FIELD, dump_permissions
+from .policies.records import get_record_permission_policy
+
+
+class PermissionsDumperExt(SearchDumperExt):
+    """Dumps the permissions of the record, see :mod:`.indexing`.
+
+    .. code-block:: python
+
+        class Record(RecordBase):
+            dumper = SearchDumper(
+                extensions=[PermissionsDumperExt(actions=["read"])]
+            )
+    """
+
+    def __init__(self, actions, policy_cls=None, key=PERMISSIONS_FIELD):
+        """Constructor.
+
+        :param actions: Actions whose permissions are dumped.
+        :param policy_cls: Policy class, defaults to the configured
+            record policy.
+        :param key: Name of the field holding the permissions.
+        """
+        self.actions = actions
+        self.policy_cls = policy_cls
+        self.key = key
+
+    def dump(self, record, data):
+        """Dump the permissions."""
+        policy_cls = self.policy_cls or get_record_permission_policy()
+        data[self.key] = dump_permissions(policy_cls, record, self.actions)
+
+    def load(self, data, record_cls):
+        """Remove the permissions."""
+        data.pop(self.key, None)
@@ -11,3 +11,7 @@
 
 class UnknownGeneratorError(Exception):
     """Error raised when an unknown generator is detected."""
+
+
+class UnknownPolicyError(Exception):
+    """Error raised when a permission policy is unknown or invalid."""
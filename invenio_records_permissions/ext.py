@@ -9,8 +9,14 @@
 
 """Permission policies for Invenio records."""
 
-
-from . import config
+from . import config, tracing
+from .cache import FileVersion, MemoryVersion, TTLCache
+from .policies.records import (
+    RecordPermissionPolicy,
+    obj_or_import_string,
+    resolve_permission_policy,
+)
+from .receivers import register_cache_invalidation
 
 
 class InvenioRecordsPermissions(object):
@@ -24,8 +30,76 @@ class InvenioRecordsPermissions(object):
     def init_app(self, app):
         """Flask application initialization."""
         self.init_config(app)
+        self.init_policies(app)
+        self.init_cache(app)
+        self.init_tracer(app)
         app.extensions["invenio-records-permissions"] = self
 
+    def init_policies(self, app):
+        """Import and validate the configured permission policies."""
+        self.policies = {}
+        self.register_record_policy(app.config["RECORDS_PERMISSIONS_RECORD_POLICY"])
+        for name, value in app.config["RECORDS_PERMISSIONS_POLICIES"].items():
+            self.policies[name] = resolve_permission_policy(value, name=name)
+
+    def register_record_policy(self, value):
+        """Resolve the record policy ``value`` and register it as "record"."""
+        self.policies["record"] = (
+            resolve_permission_policy(value) if value else RecordPermissionPolicy
+        )
+        self.record_policy_source = value
+
+    def init_cache(self, app):
+        """Initialize the caches."""
+        path = app.config["RECORDS_PERMISSIONS_GRANTS_VERSION_FILE"]
+        self.grants_version = FileVersion(path) if path else MemoryVersion()
+        version = self.grants_version
+
+        # Without a version shared by the workers, revoked grants would remain
+        # effective in the other workers until the cached entries expire.
+        ttl = app.config["RECORDS_PERMISSIONS_SUPERUSER_CACHE_TTL"]
+        self.superuser_cache = (
+            TTLCache(ttl=ttl, version=version) if ttl != 0 and path else None
+        )
+        size = app.config["RECORDS_PERMISSIONS_FILTER_CACHE_SIZE"]
+        self.filter_cache = (
+            TTLCache(
+                ttl=app.config["RECORDS_PERMISSIONS_FILTER_CACHE_TTL"],
+                maxsize=size,
+                version=version,
+            )
+            if size and path
+            else None
+        )
+        size = app.config["RECORDS_PERMISSIONS_EXPANSION_CACHE_SIZE"]
+        self.expansion_cache = (
+            TTLCache(
+                ttl=app.config["RECORDS_PERMISSIONS_EXPANSION_CACHE_TTL"],
+                maxsize=size,
+                version=version,
+            )
+            if size and path
+            else None
+        )
+        self.decision_cache = obj_or_import_string(
+            app.config["RECORDS_PERMISSIONS_DECISION_CACHE"]
+        )
+        size = app.config["RECORDS_PERMISSIONS_DECISION_CACHE_SIZE"]
+        if self.decision_cache is None and size:
+            self.decision_cache = TTLCache(
+                ttl=app.config["RECORDS_PERMISSIONS_DECISION_CACHE_TTL"],
+                maxsize=size,
+            )
+        size = app.config["RECORDS_PERMISSIONS_ACCESS_LEVELS_CACHE_SIZE"]
+        self.access_levels_cache = TTLCache(maxsize=size) if size else None
+        register_cache_invalidation()
+
+    def init_tracer(self, app):
+        """Initialize the tracer of the permission evaluation."""
+        self.tracer = obj_or_import_string(app.config["RECORDS_PERMISSIONS_TRACER"])
+        if self.tracer is not None:
+            tracing.enable()
+
     def init_config(self, app):
         """Initialize configuration."""
         # Use theme's base template if theme is installed
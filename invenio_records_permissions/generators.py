@@ -13,15 +13,40 @@ import operator
 from functools import reduce
 from itertools import chain
 
-from flask_principal import ActionNeed, UserNeed
-from invenio_access import ActionRoles, ActionUsers
+from flask import current_app, has_app_context
+from flask_principal import ActionNeed, RoleNeed, UserNeed
+from invenio_access import ActionRoles, ActionUsers, Permission
 from invenio_access.permissions import (
     any_user,
     authenticated_user,
     superuser_access,
     system_process,
 )
-from invenio_search.engine import dsl
+
+from .interning import intern_need
+from .search import dsl
+
+_instances = {}
+"""Shared instances of the generators without state, per class."""
+
+
+def _ext_cache(name):
+    """Cache ``name`` of the extension of the current app or None."""
+    if not has_app_context():
+        return None
+    ext = current_app.extensions.get("invenio-records-permissions")
+    return getattr(ext, name, None)
+
+
+class NeedSet(frozenset):
+    """Immutable set of Needs, none of which is an ActionNeed.
+
+    Generators may return it from ``need_set`` and ``excludes``: a compiled
+    check then intersects it with the Needs of the identity instead of
+    iterating over it, see :mod:`~invenio_records_permissions.policies.compiler`.
+    """
+
+    __slots__ = ()
 
 
 class Generator(object):
@@ -31,8 +56,76 @@ class Generator(object):
     level it implements the *query filters* to restrict the search.
 
     Any context inherits from this class.
+
+    Generators without state (no instance attributes, as the built-in ones
+    declaring empty ``__slots__``) are immutable and instantiated once per
+    class: e.g. ``AnyUser() is AnyUser()``.
+    """
+
+    __slots__ = ()
+
+    depends_on = None
+    """Names of the arguments ``needs`` and ``excludes`` depend on.
+
+    ``None`` (the default) means unknown, the generator is evaluated for every
+    policy. It is reset to ``None`` in subclasses overriding ``needs`` or
+    ``excludes`` without declaring it. An empty tuple marks a static
+    generator: its Needs are computed once per policy class and action, see
+    :class:`~invenio_records_permissions.policies.base.BasePermissionPolicy`.
+    """
+
+    record_paths = None
+    """Dotted paths of the record the generator reads.
+
+    ``None`` (the default) means unknown, the whole record is needed; as for
+    :attr:`depends_on`, it is reset to ``None`` in subclasses overriding
+    ``needs`` or ``excludes`` without declaring it. An empty tuple means the
+    record is not read. See :mod:`~invenio_records_permissions.projection`.
+    """
+
+    returns_action_needs = True
+    """Whether ``needs`` may return ActionNeeds.
+
+    Their deny grants exclude the identity, so the needs of such a non-static
+    generator are evaluated by
+    :meth:`~invenio_records_permissions.policies.base.BasePermissionPolicy.allows`
+    even once another generator allowed the identity. Generators declaring
+    ``False`` are skipped then.
     """
 
+    _DECLARATIONS = (
+        "depends_on",
+        "record_paths",
+        "returns_action_needs",
+        "need_set",
+        "needs_mask",
+        "excludes_mask",
+    )
+    """Declarations and derived forms (e.g. vectorized) of ``needs`` and
+    ``excludes``.
+
+    A subclass overriding one of these methods without declaring them again
+    gets the defaults of :class:`Generator`, since the declarations of its
+    parents do not describe its methods.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        """Reset the inherited declarations if ``needs``/``excludes`` change."""
+        super().__init_subclass__(**kwargs)
+        if "needs" in cls.__dict__ or "excludes" in cls.__dict__:
+            for name in cls._DECLARATIONS:
+                if name not in cls.__dict__:
+                    setattr(cls, name, getattr(Generator, name))
+
+    def __new__(cls, *args, **kwargs):
+        """Return the shared instance of the generators without state."""
+        if cls.__dictoffset__ or cls.__basicsize__ > object.__basicsize__:
+            return super().__new__(cls)
+        instance = _instances.get(cls)
+        if instance is None:
+            instance = _instances.setdefault(cls, super().__new__(cls))
+        return instance
+
     def needs(self, **kwargs):
         """Enabling Needs."""
         return []
@@ -41,14 +134,59 @@ class Generator(object):
         """Preventing Needs."""
         return []
 
-    def query_filter(self, **kwargs):
-        """Search filters."""
+    def need_set(self, **kwargs):
+        """Enabling Needs, as used by the compiled checks.
+
+        Generators may return the same Needs as
+        :meth:`~invenio_records_permissions.generators.Generator.needs` as a
+        :class:`NeedSet`, intersected with the Needs of the identity.
+        """
+        return self.needs(**kwargs)
+
+    def needs_mask(self, batch, identity):
+        """Vectorized ``needs`` over the records of ``batch``.
+
+        :param batch: A :class:`~invenio_records_permissions.columnar.RecordBatch`.
+        :param identity: The identity to check.
+        :returns: A pair of boolean arrays: whether ``identity`` provides one
+            of the Needs of each record, and whether each record has Needs.
+            ``None`` if the generator is not vectorized, the records are then
+            checked one by one. ActionNeeds are not supported.
+        """
+        return None
+
+    def excludes_mask(self, batch, identity):
+        """Vectorized ``excludes`` over the records of ``batch``.
+
+        :returns: A boolean array: whether ``identity`` provides one of the
+            excludes of each record. ``None`` if the generator is not
+            vectorized, see :meth:`needs_mask`.
+        """
+        return None
+
+    def query_filter(self, identity=None, **kwargs):
+        """Search filters.
+
+        A static generator (see :attr:`depends_on`) matches all records if
+        its Needs, with ActionNeeds expanded, allow ``identity``. Otherwise
+        it matches none.
+        """
+        if self.depends_on == () and identity is not None:
+            permission = Permission(*self.needs())
+            permission.explicit_excludes.update(self.excludes())
+            if permission.allows(identity):
+                return dsl.Q("match_all")
         return []
 
 
 class AnyUser(Generator):
     """Allows any user."""
 
+    __slots__ = ()
+
+    depends_on = ()
+    record_paths = ()
+
     def needs(self, **kwargs):
         """Enabling Needs."""
         return [any_user]
@@ -62,6 +200,11 @@ class AnyUser(Generator):
 class SystemProcess(Generator):
     """Allows system_process role."""
 
+    __slots__ = ()
+
+    depends_on = ()
+    record_paths = ()
+
     def needs(self, **kwargs):
         """Enabling Needs."""
         return [system_process]
@@ -77,6 +220,13 @@ class SystemProcess(Generator):
 class SystemProcessWithoutAdmin(SystemProcess):
     """Allows system_process role, excluding superuser-access needs."""
 
+    __slots__ = ()
+
+    # The excludes depend on the superuser-access grants in the database.
+    depends_on = None
+    record_paths = ()
+    returns_action_needs = False
+
     @staticmethod
     def _expand_superuser_access_action():
         """Fetch users and roles allowed for the superuser-access action."""
@@ -86,14 +236,40 @@ class SystemProcessWithoutAdmin(SystemProcess):
         users = ActionUsers.query_by_action(superuser_access).all()
         return chain(roles, users)
 
+    @classmethod
+    def _superuser_access_needs(cls):
+        """Needs of the users and roles allowed for the superuser-access action.
+
+        They are kept in the extension's superuser cache, if enabled.
+        """
+        cache = _ext_cache("superuser_cache")
+        needs = cache.get(superuser_access.value) if cache is not None else None
+        if needs is None:
+            needs = tuple(r.need for r in cls._expand_superuser_access_action())
+            if cache is not None:
+                cache.set(superuser_access.value, needs)
+        return needs
+
     def excludes(self, **kwargs):
         """Preventing Needs."""
-        return [role.need for role in self._expand_superuser_access_action()]
+        return list(self._superuser_access_needs())
+
+    def query_filter(self, identity=None, **kwargs):
+        """Filters for current identity as system process but not superuser."""
+        superuser_needs = self._superuser_access_needs()
+        if any(need in identity.provides for need in superuser_needs):
+            return []
+        return super().query_filter(identity=identity, **kwargs)
 
 
 class Disable(Generator):
     """Denies ALL users including users and roles allowed to superuser-access action."""
 
+    __slots__ = ()
+
+    depends_on = ()
+    record_paths = ()
+
     def excludes(self, **kwargs):
         """Preventing Needs."""
         return [any_user]
@@ -106,6 +282,11 @@ class Disable(Generator):
 class Admin(Generator):
     """Allows users with admin-access (different from superuser-access)."""
 
+    __slots__ = ()
+
+    depends_on = ()
+    record_paths = ()
+
     def needs(self, **kwargs):
         """Enabling Needs."""
         return [ActionNeed("admin-access")]
@@ -114,9 +295,26 @@ class Admin(Generator):
 class RecordOwners(Generator):
     """Allows record owners."""
 
+    __slots__ = ()
+
+    depends_on = ("record",)
+    record_paths = ("owners",)
+    returns_action_needs = False
+
     def needs(self, record=None, **kwargs):
         """Enabling Needs."""
-        return [UserNeed(owner) for owner in record.get("owners", [])]
+        return [intern_need(UserNeed, owner) for owner in record.get("owners", [])]
+
+    def needs_mask(self, batch, identity):
+        """Vectorized needs, over the owners column."""
+        owners = batch.needs(
+            (type(self), "owners"), lambda record: self.needs(record=record)
+        )
+        return owners.intersects(identity.provides), owners.nonempty()
+
+    def excludes_mask(self, batch, identity):
+        """Vectorized excludes."""
+        return batch.full(False)
 
     def query_filter(self, identity=None, **kwargs):
         """Filters for current identity as owner."""
@@ -132,6 +330,12 @@ class AnyUserIfPublic(Generator):
     TODO: Revisit when dealing with files.
     """
 
+    __slots__ = ()
+
+    depends_on = ("record",)
+    record_paths = ("_access.metadata_restricted",)
+    returns_action_needs = False
+
     def needs(self, record=None, **kwargs):
         """Enabling Needs."""
         is_restricted = record and record.get("_access", {}).get(
@@ -143,6 +347,18 @@ class AnyUserIfPublic(Generator):
         """Preventing Needs."""
         return []
 
+    def needs_mask(self, batch, identity):
+        """Vectorized needs, over the ``metadata_restricted`` column."""
+        restricted = batch.flags(
+            (type(self), "_access.metadata_restricted"),
+            lambda record: record.get("_access", {}).get("metadata_restricted"),
+        )
+        return ~restricted & (any_user in identity.provides), ~restricted
+
+    def excludes_mask(self, batch, identity):
+        """Vectorized excludes."""
+        return batch.full(False)
+
     def query_filter(self, **kwargs):
         """Filters for non-restricted records."""
         # TODO: Implement with new permissions metadata
@@ -152,6 +368,11 @@ class AnyUserIfPublic(Generator):
 class AuthenticatedUser(Generator):
     """Allows authenticated users."""
 
+    __slots__ = ()
+
+    depends_on = ()
+    record_paths = ()
+
     def needs(self, **kwargs):
         """Enabling Needs."""
         return [authenticated_user]
@@ -165,6 +386,12 @@ class AuthenticatedUser(Generator):
 class AllowedByAccessLevel(Generator):
     """Allows users/roles/groups that have an appropriate access level."""
 
+    __slots__ = ("action",)
+
+    depends_on = ("record",)
+    record_paths = ("internal.access_levels",)
+    returns_action_needs = False
+
     # TODO: Implement other access levels:
     # 'metadata_reader'
     # 'files_reader'
@@ -181,8 +408,48 @@ class AllowedByAccessLevel(Generator):
         """Constructor."""
         self.action = action
 
+    SCHEME_TO_NEED = {"person": UserNeed, "role": RoleNeed, "group": RoleNeed}
+    """Need of an identity of an access level, per scheme."""
+
+    @classmethod
+    def access_levels_index(cls, record):
+        """Needs of the identities of each access level of ``record``.
+
+        The index is computed once per record revision (class, ``id`` and
+        ``revision_id``) and kept in the extension's access levels cache, see
+        ``RECORDS_PERMISSIONS_ACCESS_LEVELS_CACHE_SIZE``. Changes of the
+        access levels are hence only seen once committed.
+
+        :returns: A dict mapping the access levels to a :class:`NeedSet`.
+        """
+        key = None
+        cache = _ext_cache("access_levels_cache")
+        record_id = getattr(record, "id", None)
+        revision_id = getattr(record, "revision_id", None)
+        if cache is not None and record_id is not None and revision_id is not None:
+            key = (type(record), record_id, revision_id)
+            index = cache.get(key)
+            if index is not None:
+                return index
+
+        index = {}
+        # Name "identity" is used bc it correlates with flask-principal
+        # identity while not being one.
+        access_levels = record.get("internal", {}).get("access_levels", {})
+        for access_level, identities in access_levels.items():
+            needs = []
+            for identity in identities:
+                need_cls = cls.SCHEME_TO_NEED.get(identity.get("scheme"))
+                if need_cls is not None and identity.get("id"):
+                    needs.append(intern_need(need_cls, identity["id"]))
+            index[access_level] = NeedSet(needs)
+
+        if key is not None:
+            cache.set(key, index)
+        return index
+
     def needs(self, record=None, **kwargs):
-        """Enabling UserNeeds for each person."""
+        """Enabling Needs of the identities of the access levels."""
         if not record:
             return []
 
@@ -201,20 +468,55 @@ class AllowedByAccessLevel(Generator):
             ]
         )
 
-        return [
-            UserNeed(identity.get("id"))
-            for identity in allowed_identities
-            if identity.get("scheme") == "person" and identity.get("id")
-            # TODO: Implement other schemes
-        ]
+        needs = []
+        for identity in allowed_identities:
+            need_cls = self.SCHEME_TO_NEED.get(identity.get("scheme"))
+            if need_cls is not None and identity.get("id"):
+                needs.append(intern_need(need_cls, identity["id"]))
+        return needs
+
+    def need_set(self, record=None, **kwargs):
+        """Enabling Needs, from the :meth:`access_levels_index` of the record."""
+        if not record:
+            return NeedSet()
+
+        access_levels = AllowedByAccessLevel.ACTION_TO_ACCESS_LEVELS.get(
+            self.action, []
+        )
+        index = self.access_levels_index(record)
+        if len(access_levels) == 1:
+            return index.get(access_levels[0], NeedSet())
+        return NeedSet(
+            chain.from_iterable(index.get(level, ()) for level in access_levels)
+        )
+
+    def needs_mask(self, batch, identity):
+        """Vectorized needs, over the column of the access levels entries."""
+        access_levels = AllowedByAccessLevel.ACTION_TO_ACCESS_LEVELS.get(
+            self.action, []
+        )
+        entries = batch.needs(
+            (type(self), "internal.access_levels") + tuple(access_levels),
+            lambda record: self.need_set(record=record),
+        )
+        return entries.intersects(identity.provides), entries.nonempty()
+
+    def excludes_mask(self, batch, identity):
+        """Vectorized excludes."""
+        return batch.full(False)
 
     def query_filter(self, identity=None, **kwargs):
         """Search filter for the current user with this generator."""
-        id_need = next(
-            (need for need in identity.provides if need.method == "id"), None
-        )
+        schemes = {}
+        for scheme, need_cls in self.SCHEME_TO_NEED.items():
+            schemes.setdefault(need_cls("").method, []).append(scheme)
+        allowed_identities = [
+            (scheme, need.value)
+            for need in identity.provides
+            for scheme in schemes.get(need.method, [])
+        ]
 
-        if not id_need:
+        if not allowed_identities:
             return []
 
         # To get the record in the search results, the access level must
@@ -226,13 +528,13 @@ class AllowedByAccessLevel(Generator):
                 "term",
                 **{
                     "internal.access_levels.{}".format(access_level): {
-                        "scheme": "person",
-                        "id": id_need.value
-                        # TODO: Implement other schemes
+                        "scheme": scheme,
+                        "id": value,
                     }
                 }
             )
             for access_level in read_levels
+            for scheme, value in allowed_identities
         ]
 
         return reduce(operator.or_, queries)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Permissions precomputed at indexing time.
+
+The Needs returned by the generators of a policy action are indexed as
+keyword tokens in the ``_permissions.<action>`` field of the record (and the
+excluded ones in ``_permissions.<action>_excludes``), e.g.:
+
+.. code-block:: json
+
+    {"_permissions": {"read": ["user:12", "role:curators", "any_user"]}}
+
+Searching then boils down to a ``terms`` query over the tokens of the Needs
+provided by the identity, plus the ``action:<action>`` tokens of the actions
+granted to it (see :func:`identity_action_needs`). ActionNeeds are hence
+indexed as such, and not expanded to the users and roles they are granted
+to: changing the grant of an ActionNeed does not require reindexing the
+records.
+
+The Needs of generators reading the database are indexed as they are at
+dumping time though, e.g. the superusers excluded by
+``SystemProcessWithoutAdmin`` (generators declaring ``depends_on = None``):
+the records have to be reindexed when the grants they read change, e.g. when
+``superuser-access`` is granted to a new role.
+
+The tokens should be mapped as ``keyword`` and the record dumped with
+:class:`~invenio_records_permissions.dumpers.PermissionsDumperExt`; the
+actions listed in the ``indexed_actions`` of the policy then use this query
+filter.
+"""
+
+from flask_principal import ActionNeed
+from invenio_access import ActionRoles, ActionSystemRoles, ActionUsers
+from invenio_access.permissions import ParameterizedActionNeed
+from invenio_accounts.models import Role
+
+from .search import dsl
+
+PERMISSIONS_FIELD = "_permissions"
+"""Name of the field holding the indexed permissions."""
+
+_METHOD_PREFIXES = {"id": "user", "role": "role", "action": "action"}
+
+
+def need_to_token(need):
+    """Keyword token of ``need``.
+
+    E.g. ``user:12`` for ``UserNeed(12)``, ``role:curators`` for
+    ``RoleNeed("curators")`` and ``any_user`` for the ``any_user`` system role.
+    """
+    if need.method == "system_role":
+        return str(need.value)
+    prefix = _METHOD_PREFIXES.get(need.method, need.method)
+    token = "{}:{}".format(prefix, need.value)
+    argument = getattr(need, "argument", None)
+    if argument is not None:
+        token = "{}:{}".format(token, argument)
+    return token
+
+
+def needs_to_tokens(needs):
+    """Sorted keyword tokens of ``needs``."""
+    return sorted({need_to_token(need) for need in needs})
+
+
+def _record_tokens(needs):
+    """Sorted keyword tokens of the Needs of a record.
+
+    A parameterized ActionNeed also yields the token of its action, as an
+    action granted without argument is granted for any argument.
+    """
+    tokens = set(needs_to_tokens(needs))
+    for need in needs:
+        if need.method == "action" and getattr(need, "argument", None) is not None:
+            tokens.add("action:{}".format(need.value))
+    return sorted(tokens)
+
+
+def identity_action_needs(identity):
+    """Action Needs granted to the users and roles provided by ``identity``.
+
+    The grants of the users, roles and system roles are fetched in (at most)
+    three queries. As for ``invenio_access.permissions.Permission``, an action
+    denied to one of them is not granted.
+    """
+    provided = {}
+    for need in identity.provides:
+        provided.setdefault(need.method, []).append(need.value)
+
+    grants = []
+    if provided.get("id"):
+        grants += ActionUsers.query.filter(
+            ActionUsers.user_id.in_(provided["id"])
+        ).all()
+    if provided.get("role"):
+        grants += (
+            ActionRoles.query.join(ActionRoles.role)
+            .filter(Role.name.in_(provided["role"]))
+            .all()
+        )
+    if provided.get("system_role"):
+        grants += ActionSystemRoles.query.filter(
+            ActionSystemRoles.role_name.in_(provided["system_role"])
+        ).all()
+
+    allowed, denied = set(), set()
+    for grant in grants:
+        (denied if grant.exclude else allowed).add((grant.action, grant.argument))
+    return {
+        ParameterizedActionNeed(action, argument) if argument else ActionNeed(action)
+        for action, argument in allowed
+        if (action, argument) not in denied and (action, None) not in denied
+    }
+
+
+def identity_tokens(identity, actions=True):
+    """Keyword tokens of the Needs provided by ``identity``.
+
+    :param actions: Whether to add the tokens of the ActionNeeds granted to
+        the identity, see :func:`identity_action_needs`.
+    """
+    needs = set(identity.provides)
+    if actions:
+        needs.update(identity_action_needs(identity))
+    return needs_to_tokens(needs)
+
+
+def dump_permissions(policy_cls, record, actions):
+    """Indexed permissions of ``record`` for ``actions``.
+
+    :returns: A dict with the tokens of the Needs allowed for each action
+        and, if any, of the excluded ones.
+    """
+    permissions = {}
+    for action in actions:
+        needs, excludes = policy_cls(action, record=record).generator_needs()
+        permissions[action] = _record_tokens(needs)
+        if excludes:
+            permissions[action + "_excludes"] = _record_tokens(excludes)
+    return permissions
+
+
+def indexed_query_filter(action, tokens, field=PERMISSIONS_FIELD):
+    """Query filter of the records indexed as allowing one of ``tokens``."""
+    return dsl.Q(
+        "bool",
+        filter=[dsl.Q("terms", **{"{}.{}".format(field, action): tokens})],
+        must_not=[dsl.Q("terms", **{"{}.{}_excludes".format(field, action): tokens})],
+    )
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Interned Needs.
+
+Generators such as ``RecordOwners`` create a Need per value of the record on
+each check, e.g. ``UserNeed(owner)`` for each owner. Building such a
+namedtuple costs about ten times a dict lookup, so the Needs are interned
+instead: equal Needs are the same instance, created once per process.
+
+.. code-block:: python
+
+    need = intern_need(UserNeed, owner)
+
+The table is bounded by :data:`MAX_INTERNED_NEEDS`: once full, the Needs are
+created as before.
+"""
+
+MAX_INTERNED_NEEDS = 10000
+"""Maximum number of Needs in the :data:`needs_table`."""
+
+
+class NeedTable(object):
+    """Interning table of the Needs."""
+
+    def __init__(self, maxsize=MAX_INTERNED_NEEDS):
+        """Constructor.
+
+        :param maxsize: Maximum number of interned Needs.
+        """
+        self.maxsize = maxsize
+        self._needs = {}
+
+    def __len__(self):
+        """Number of interned Needs."""
+        return len(self._needs)
+
+    def need(self, need_cls, value):
+        """Interned ``need_cls(value)``, e.g. ``UserNeed`` and a user id."""
+        key = (need_cls, value)
+        need = self._needs.get(key)
+        if need is None:
+            need = need_cls(value)
+            if len(self._needs) < self.maxsize:
+                # Concurrent threads intern the same instance
+                need = self._needs.setdefault(key, need)
+        return need
+
+
+needs_table = NeedTable()
+"""Needs interned by the process."""
+
+intern_need = needs_table.need
+"""Interned ``need_cls(value)`` of the process, see :meth:`NeedTable.need`."""
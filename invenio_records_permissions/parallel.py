@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Bulk permission checks sharded across a thread or process pool.
+
+Large sweeps (e.g. auditing who can read what after a policy change) are CPU
+bound in the generators. :func:`parallel_bulk_can` splits the records in
+shards checked by the workers of a :mod:`concurrent.futures` executor:
+
+.. code-block:: python
+
+    with ProcessPoolExecutor() as executor:
+        allowed = parallel_bulk_can(
+            RecordPermissionPolicy, "read", identity, records, executor
+        )
+
+Only what the check needs is sent to the workers: the policy class and the
+action (pickled by reference), the Needs provided by the identity and the
+expansions of the static ActionNeeds of the action, as plain tuples, and the
+projections of the records on the
+:meth:`~invenio_records_permissions.policies.base.BasePermissionPolicy.record_paths`
+of the action, unless a generator does not declare the paths it reads (e.g. a
+subclass overriding ``needs``): the whole records are sent then. The workers
+check the records without application context nor database access.
+Generators returning ActionNeeds over records, which need the database to be
+expanded, are hence not supported. If a generator of the action may read the
+database (it does not declare its
+:attr:`~invenio_records_permissions.generators.Generator.depends_on`, e.g.
+``SystemProcessWithoutAdmin``), the records are checked in the calling
+process with
+:meth:`~invenio_records_permissions.policies.base.BasePermissionPolicy.bulk_can`
+instead.
+
+A process pool scales with the cores; a thread pool only helps if the
+generators release the GIL.
+"""
+
+from collections import namedtuple
+from itertools import islice
+
+from flask_principal import Identity, Need
+from invenio_access.permissions import ParameterizedActionNeed
+
+from .projection import project
+
+_Expansion = namedtuple("_Expansion", ["needs", "excludes"])
+
+
+def _dump_needs(needs):
+    """Needs as plain tuples, to be pickled."""
+    return tuple(tuple(need) for need in needs)
+
+
+def _load_need(need):
+    """Need of the plain tuple ``need``."""
+    if len(need) == 3:
+        return ParameterizedActionNeed(need[1], need[2])
+    return Need(*need)
+
+
+def _load_needs(needs):
+    """Set of the Needs of the plain tuples ``needs``."""
+    return {_load_need(need) for need in needs}
+
+
+def _check_shard(policy_cls, action, identity_id, provides, expansions, records):
+    """Check the ``records`` of a shard, in a worker."""
+    identity = Identity(identity_id)
+    identity.provides.update(_load_needs(provides))
+    expansions = {
+        _load_need(need): _Expansion(_load_needs(needs), _load_needs(excludes))
+        for need, (needs, excludes) in expansions.items()
+    }
+    results = []
+    for record in records:
+        policy = policy_cls(action, record=record)
+        policy._expansions = expansions
+        results.append(policy.allows(identity))
+    return results
+
+
+def _shards(records, size):
+    records = iter(records)
+    while True:
+        shard = list(islice(records, size))
+        if not shard:
+            return
+        yield shard
+
+
+def parallel_bulk_can(policy_cls, action, identity, records, executor, shard_size=1000):
+    """Check if ``identity`` can do ``action`` over each of ``records``.
+
+    The decisions are the ones of
+    :meth:`~invenio_records_permissions.policies.base.BasePermissionPolicy.bulk_can`.
+
+    :param policy_cls: The policy class, importable by the workers.
+    :param action: The action to check.
+    :param identity: The identity to check.
+    :param records: Iterable of records, or of their projections.
+    :param executor: A :class:`concurrent.futures.Executor`, e.g. a
+        ``ProcessPoolExecutor``.
+    :param shard_size: Number of records checked per task.
+    :returns: A list of booleans, one per record, in input order.
+    """
+    policy = policy_cls(action)
+    compiled = policy._compiled_action(action)
+    # The workers have no application context to query the database
+    if any(generator.depends_on is None for generator in compiled.generators):
+        return policy_cls.bulk_can(action, identity, records)
+    expansions = {}
+    for need in compiled.action_needs | compiled.action_excludes:
+        expanded = policy._expand_action(need)
+        expansions[tuple(need)] = (
+            _dump_needs(expanded.needs),
+            _dump_needs(expanded.excludes),
+        )
+
+    paths = policy_cls.record_paths(action)
+    if paths is not None:
+        records = (project(record, paths) for record in records)
+
+    provides = _dump_needs(identity.provides)
+    futures = [
+        executor.submit(
+            _check_shard,
+            policy_cls,
+            action,
+            identity.id,
+            provides,
+            expansions,
+            shard,
+        )
+        for shard in _shards(records, shard_size)
+    ]
+    results = []
+    for future in futures:
+        results.extend(future.result())
+    return results
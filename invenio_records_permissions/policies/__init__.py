@@ -10,4 +10,9 @@
 """Invenio Records Permissions Policies."""
 
 from .base import BasePermissionPolicy
-from .records import RecordPermissionPolicy, get_record_permission_policy
+from .compiler import compile_policy
+from .records import (
+    RecordPermissionPolicy,
+    get_permission_policy,
+    get_record_permission_policy,
+)
@@ -9,13 +9,79 @@
 
 """Base access controls."""
 
-from itertools import chain
+import asyncio
+from functools import partial
 
+from flask import (
+    copy_current_request_context,
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+)
 from invenio_access import Permission
 from invenio_access.permissions import superuser_access
-from invenio_search.engine import dsl
 
+from ..cache import identity_fingerprint
 from ..generators import Disable
+from ..indexing import identity_tokens, indexed_query_filter
+from ..search import dsl
+from ..tracing import call_generator, current_tracer, trace, traced
+from .compiler import CompiledPolicy
+
+_disabled = [Disable()]
+"""Generators of the actions a policy does not define."""
+
+_static_needs = {}
+"""Needs/excludes of the static generators per (policy class, action)."""
+
+_compiled = {}
+"""Compiled actions per policy class."""
+
+
+def _run_in_app_context(executor, func, *args):
+    """Run ``func(*args)`` in ``executor`` within copies of the current contexts.
+
+    The worker gets an app context with a copy of the attributes of ``g``
+    (e.g. ``g.identity``) and, within a request, a copy of the request context
+    (see :func:`flask.copy_current_request_context`): the generators see the
+    same ``g``, ``request`` and ``current_user`` as in the caller. The changes
+    of ``g`` made in the worker are not seen by the caller though.
+
+    :returns: An awaitable of the result.
+    """
+    app = current_app._get_current_object()
+    attributes = dict(vars(g._get_current_object()))
+    call = partial(func, *args)
+    if has_request_context():
+        call = copy_current_request_context(call)
+
+    def run():
+        with app.app_context():
+            vars(g._get_current_object()).update(attributes)
+            return call()
+
+    return asyncio.get_running_loop().run_in_executor(executor, run)
+
+
+def _expansion_cache():
+    """Expansion cache of the ActionNeeds of the current app or None."""
+    if not has_app_context():
+        return None
+    ext = current_app.extensions.get("invenio-records-permissions")
+    return getattr(ext, "expansion_cache", None)
+
+
+def _decision_cache():
+    """Decision cache and grants version of the current app, or None."""
+    if not has_app_context():
+        return None
+    ext = current_app.extensions.get("invenio-records-permissions")
+    cache = getattr(ext, "decision_cache", None)
+    if cache is None:
+        return None
+    return cache, ext.grants_version
+
 
 # Where can a property be used?
 #
@@ -46,6 +112,11 @@ class BasePermissionPolicy(Permission):
     If `can_<self.action>`
         is not defined, no one is allowed (Disable()).
         is an empty list, only Super Users are allowed (via NOTE above).
+
+    The Needs of static generators (see
+    :attr:`~invenio_records_permissions.generators.Generator.depends_on`)
+    are computed once per policy class and action. Hence, the ``can_<action>``
+    lists should not be modified in place once the policy is in use.
     """
 
     can_search = []
@@ -54,21 +125,273 @@ class BasePermissionPolicy(Permission):
     can_update = []
     can_delete = []
 
+    short_circuit = True
+    """Stop :meth:`allows` as soon as the check is decided.
+
+    See :mod:`~invenio_records_permissions.policies.compiler` for the order in
+    which the generators are evaluated.
+    """
+
+    indexed_actions = ()
+    """Actions searched through the permissions precomputed at indexing time.
+
+    See :mod:`~invenio_records_permissions.indexing`.
+    """
+
+    # Policies are created for each check: their state is kept in slots, and
+    # the sets of explicit Needs are only created when the generators are
+    # loaded (see ``explicit_needs``). ``_expansions`` holds the ActionNeed
+    # expansions reused by the policy (or a batch of policies), ``_calls`` the
+    # results of the generators shared by the policies of ``allowed_actions``.
+    __slots__ = (
+        "action",
+        "over",
+        "_permissions",
+        "_explicit_needs",
+        "_explicit_excludes",
+        "_expansions",
+        "_calls",
+    )
+
     def __init__(self, action, **over):
         """Constructor."""
-        super().__init__()
+        # Permission.__init__() is not called, to not create the sets of
+        # explicit Needs.
+        self._permissions = None
+        self._explicit_needs = None
+        self._explicit_excludes = None
+        self._expansions = None
+        self._calls = None
         self.action = action
         self.over = over
 
+    @property
+    def explicit_needs(self):
+        """Needs returned by the generators, before ActionNeed expansion."""
+        if self._explicit_needs is None:
+            self._explicit_needs = {superuser_access}
+        return self._explicit_needs
+
+    @explicit_needs.setter
+    def explicit_needs(self, value):
+        """Set the explicit Needs."""
+        self._explicit_needs = value
+
+    @property
+    def explicit_excludes(self):
+        """Excludes returned by the generators, before ActionNeed expansion."""
+        if self._explicit_excludes is None:
+            self._explicit_excludes = set()
+        return self._explicit_excludes
+
+    @explicit_excludes.setter
+    def explicit_excludes(self, value):
+        """Set the explicit excludes."""
+        self._explicit_excludes = value
+
+    @classmethod
+    def bulk_can(cls, action, identity, records, **over):
+        """Check if ``identity`` can do ``action`` over each of ``records``.
+
+        The ActionNeeds (including superuser-access) are expanded once for
+        the whole batch instead of once per record.
+
+        :param action: The action to check.
+        :param identity: The identity to check.
+        :param records: Iterable of records, or of their projections on the
+            :meth:`record_paths` of the action.
+        :param over: Additional arguments passed to the generators.
+        :returns: A list of booleans, one per record, in input order.
+        """
+        expansions = {}
+        results = []
+        for record in records:
+            policy = cls(action, record=record, **over)
+            policy._expansions = expansions
+            results.append(policy.allows(identity))
+        return results
+
+    @classmethod
+    def allowed_actions(cls, actions, identity, **over):
+        """Check if ``identity`` can do each of ``actions``.
+
+        E.g. all the actions a record page displays, over the same record.
+        Each generator is called once for all the actions and the ActionNeeds
+        (including superuser-access) are expanded once.
+
+        :param actions: The actions to check.
+        :param identity: The identity to check.
+        :param over: Arguments of the policies, e.g. ``record``.
+        :returns: A dict mapping each action to a boolean.
+        """
+        expansions, calls = {}, {}
+        results = {}
+        for action in actions:
+            policy = cls(action, **over)
+            policy._expansions = expansions
+            policy._calls = calls
+            results[action] = policy.allows(identity)
+        return results
+
+    @classmethod
+    def _compiled_action(cls, action):
+        """Compiled check of ``action``, see :mod:`.compiler`."""
+        compiled = _compiled.get(cls)
+        if compiled is None:
+            compiled = _compiled[cls] = CompiledPolicy(cls)
+        return compiled[action]
+
     @property
     def generators(self):
         """List of Needs generators for self.action.
 
         Defaults to Disable() if no can_<self.action> defined.
         """
-        return getattr(self.__class__, "can_" + self.action, [Disable()])
+        return self._generators_for(self.action)
+
+    @classmethod
+    def _generators_for(cls, action):
+        """List of Needs generators for ``action``."""
+        return getattr(cls, "can_" + action, _disabled)
+
+    @classmethod
+    def record_paths(cls, action):
+        """Dotted paths of the record read by the generators of ``action``.
+
+        The policy can then be checked over a projection of the record on
+        these paths, see :mod:`~invenio_records_permissions.projection`.
+
+        :returns: A set of paths, or ``None`` if a generator needs the whole
+            record.
+        """
+        paths = set()
+        for generator in cls._generators_for(action):
+            if generator.record_paths is None:
+                return None
+            paths.update(generator.record_paths)
+        return paths
+
+    @classmethod
+    def _split_generators(cls, action, generators):
+        """Needs, excludes of the static generators and the other generators.
+
+        The static Needs are computed at first use and cached per policy class
+        and action.
+        """
+        entry = _static_needs.get((cls, action))
+        if entry is None or entry[0] is not generators:
+            needs, excludes, dynamic = set(), set(), []
+            for generator in generators:
+                if generator.depends_on == ():
+                    needs.update(generator.needs())
+                    excludes.update(generator.excludes())
+                else:
+                    dynamic.append(generator)
+            entry = (generators, frozenset(needs), frozenset(excludes), dynamic)
+            _static_needs[(cls, action)] = entry
+        return entry[1:]
+
+    def generator_needs(self):
+        """Needs and excludes returned by the generators.
+
+        Contrary to :attr:`needs` and :attr:`excludes`, ActionNeeds are not
+        expanded and ``superuser_access`` is not added.
+
+        :returns: A ``(needs, excludes)`` pair of sets.
+        """
+        static_needs, static_excludes, generators = self._split_generators(
+            self.action, self.generators
+        )
+        needs, excludes = set(static_needs), set(static_excludes)
+        tracer = current_tracer()
+        for generator in generators:
+            needs.update(self._call_generator(generator, "needs", tracer))
+            excludes.update(self._call_generator(generator, "excludes", tracer))
+        return needs, excludes
+
+    def _call_generator(self, generator, method, tracer=None):
+        """Call ``method`` of ``generator`` over the policy arguments.
+
+        The results are reused if the policy shares them (see
+        :meth:`allowed_actions`).
+        """
+        calls = self._calls
+        if calls is not None:
+            key = (id(generator), method)
+            if key in calls:
+                return calls[key]
+        if tracer is None:
+            result = getattr(generator, method)(**self.over)
+        else:
+            result = call_generator(
+                tracer, type(self), self.action, generator, method, self.over
+            )
+        if calls is not None:
+            calls[key] = result
+        return result
+
+    def _load_generators(self):
+        """Collect the Needs of the generators and expand them.
+
+        The result is computed once per instance, see :meth:`invalidate`.
+        """
+        if self._permissions is not None:
+            return
+        needs, excludes = self.generator_needs()
+        self.explicit_needs.update(needs)
+        self.explicit_excludes.update(excludes)
+        self._load_permissions()  # self.explicit_* are used here
+
+    @traced("load_permissions")
+    def _load_permissions(self):
+        """Load permissions for all needs, expanding actions."""
+        super()._load_permissions()
+
+    def invalidate(self):
+        """Forget the computed needs and excludes.
+
+        The next access to ``needs`` or ``excludes`` runs the generators
+        again, e.g. after the object the policy is over has been modified.
+        """
+        self._permissions = None
+        self._explicit_needs = None
+        self._explicit_excludes = None
+
+    def _expand_action(self, explicit_action):
+        """Expand action to user/roles needs and excludes.
+
+        The expansion is reused by the policy (or a batch of policies), and
+        cached per process, see ``RECORDS_PERMISSIONS_EXPANSION_CACHE_SIZE``.
+        """
+        expansions = self._expansions
+        if expansions is not None and explicit_action in expansions:
+            return expansions[explicit_action]
+        cache = _expansion_cache()
+        expanded = cache.get(explicit_action) if cache is not None else None
+        if expanded is None:
+            expanded = self._query_expansion(explicit_action)
+            if cache is not None:
+                cache.set(explicit_action, expanded)
+        if expansions is not None:
+            expansions[explicit_action] = expanded
+        return expanded
+
+    def _query_expansion(self, explicit_action):
+        """Expand action to user/roles needs and excludes from the database."""
+        tracer = current_tracer()
+        if tracer is None:
+            return super()._expand_action(explicit_action)
+        with trace(
+            tracer,
+            "expand_action",
+            policy=type(self),
+            action=self.action,
+            need=explicit_action,
+        ):
+            return super()._expand_action(explicit_action)
 
     @property
+    @traced("needs")
     def needs(self):
         """Set of Needs granting permission.
 
@@ -83,12 +406,11 @@ class BasePermissionPolicy(Permission):
             It also expands ActionNeeds into the Users/Roles that
             provide them.
         """
-        needs = [generator.needs(**self.over) for generator in self.generators]
-        self.explicit_needs |= set(chain.from_iterable(needs))
-        self._load_permissions()  # self.explicit_needs is used here
+        self._load_generators()
         return self._permissions.needs
 
     @property
+    @traced("excludes")
     def excludes(self):
         """Set of Needs denying permission.
 
@@ -106,11 +428,84 @@ class BasePermissionPolicy(Permission):
         If the same Need is returned by `needs` and `excludes`, then that
         Need provider is disallowed.
         """
-        excludes = [generator.excludes(**self.over) for generator in self.generators]
-        self.explicit_excludes |= set(chain.from_iterable(excludes))
-        self._load_permissions()  # self.explicit_excludes is used here
+        self._load_generators()
         return self._permissions.excludes
 
+    @traced("allows")
+    def allows(self, identity):
+        """Whether the identity can access this permission.
+
+        Unless the needs and excludes are already computed, the generators are
+        only evaluated until the check is decided. E.g. public records are
+        allowed by ``AnyUserIfPublic`` without running ``RecordOwners``.
+
+        The decisions over a record are cached if
+        ``RECORDS_PERMISSIONS_DECISION_CACHE_SIZE`` (or
+        ``RECORDS_PERMISSIONS_DECISION_CACHE``) is set.
+        """
+        cache = _decision_cache()
+        key = self._decision_key(identity, cache[1]) if cache is not None else None
+        if key is None:
+            return self._allows(identity)
+        decision = cache[0].get(key)
+        if decision is None:
+            decision = self._allows(identity)
+            cache[0].set(key, decision)
+        return decision
+
+    def _decision_key(self, identity, grants_version):
+        """Key of the decision of ``identity`` in the decision cache.
+
+        ``None`` unless the policy is only over a record with an id and a
+        revision, and possibly over the checked identity itself. The record
+        class is part of the key, as drafts and records share ids.
+        """
+        over = self.over
+        record = over.get("record")
+        arguments = len(over)
+        if "identity" in over:
+            if over["identity"] is not identity:
+                return None
+            arguments -= 1
+        if record is None or arguments != 1:
+            return None
+        record_id = getattr(record, "id", None)
+        revision_id = getattr(record, "revision_id", None)
+        if record_id is None or revision_id is None:
+            return None
+        cls = type(self)
+        record_cls = type(record)
+        return "{}.{}:{}:{}.{}:{}:{}:{}:{}".format(
+            cls.__module__,
+            cls.__qualname__,
+            self.action,
+            record_cls.__module__,
+            record_cls.__qualname__,
+            record_id,
+            revision_id,
+            identity_fingerprint(identity),
+            grants_version.get(),
+        )
+
+    def _allows(self, identity):
+        """Whether the identity can access this permission, not cached."""
+        if self.short_circuit and self._permissions is None:
+            action = self._compiled_action(self.action)
+            if action.source is self.generators:
+                if self._expansions is None and _expansion_cache() is None:
+                    self._expansions = {}
+                tracer = current_tracer()
+                call = None
+                if self._calls is not None:
+
+                    def call(generator, method):
+                        return self._call_generator(generator, method, tracer)
+
+                return action.allows(
+                    identity, self.over, self._expand_action, tracer, call
+                )
+        return super().allows(identity)
+
     def _query_filters_superuser(self, filters):
         """Allow superuser identity to retrieve all results."""
         identity = self.over.get("identity")
@@ -126,12 +521,96 @@ class BasePermissionPolicy(Permission):
         return filters
 
     @property
+    @traced("query_filters")
     def query_filters(self):
         """List of search engine query filters.
 
         These filters consist of additive queries mapping to what the current
         user should be able to retrieve via search.
         """
-        filters = [generator.query_filter(**self.over) for generator in self.generators]
+        if self.action in self.indexed_actions:
+            identity = self.over.get("identity")
+            tokens = identity_tokens(identity) if identity else []
+            filters = [indexed_query_filter(self.action, tokens)]
+            return self._query_filters_superuser(filters)
+
+        tracer = current_tracer()
+        filters = [
+            self._call_generator(g, "query_filter", tracer) for g in self.generators
+        ]
         filters = self._query_filters_superuser(filters)
         return [f for f in filters if f]
+
+    async def _aload_generators(self, executor=None):
+        """Asynchronous :meth:`_load_generators`.
+
+        The dynamic generators, then the ActionNeed expansions, are run
+        concurrently in ``executor``.
+        """
+        if self._permissions is not None:
+            return
+        static_needs, static_excludes, generators = self._split_generators(
+            self.action, self.generators
+        )
+        tracer = current_tracer()
+        results = await asyncio.gather(
+            *(
+                _run_in_app_context(
+                    executor, self._call_generator, generator, method, tracer
+                )
+                for generator in generators
+                for method in ("needs", "excludes")
+            )
+        )
+        self.explicit_needs.update(static_needs, *results[::2])
+        self.explicit_excludes.update(static_excludes, *results[1::2])
+
+        if self._expansions is None:
+            self._expansions = {}
+        await asyncio.gather(
+            *(
+                _run_in_app_context(executor, self._expand_action, need)
+                for need in self.explicit_needs | self.explicit_excludes
+                if need.method == "action"
+            )
+        )
+        self._load_permissions()  # the expansions are reused here
+
+    async def aallows(self, identity, executor=None):
+        """Asynchronous :meth:`allows`.
+
+        The generators and the ActionNeed expansions, which may query the
+        database, are run concurrently in ``executor`` (the default executor
+        of the event loop if ``None``) instead of blocking the event loop.
+        They run with copies of ``g`` and of the request context: the
+        attributes they set on ``g`` are not seen by the caller.
+        """
+        await self._aload_generators(executor)
+        return self.allows(identity)
+
+    async def acan(self, executor=None):
+        """Asynchronous ``can()``, see :meth:`aallows`."""
+        await self._aload_generators(executor)
+        return self.can()
+
+    async def aquery_filters(self, executor=None):
+        """Asynchronous :attr:`query_filters`.
+
+        The query filters of the generators are computed concurrently in
+        ``executor``, see :meth:`aallows`.
+        """
+        if self.action in self.indexed_actions:
+            return await _run_in_app_context(executor, getattr, self, "query_filters")
+        tracer = current_tracer()
+        filters = await asyncio.gather(
+            *(
+                _run_in_app_context(
+                    executor, self._call_generator, g, "query_filter", tracer
+                )
+                for g in self.generators
+            )
+        )
+        filters = await _run_in_app_context(
+            executor, self._query_filters_superuser, list(filters)
+        )
+        return [f for f in filters if f]
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Precompiled permission checks.
+
+A policy action is compiled once into a :class:`CompiledAction` holding the
+Needs of its static generators as frozensets. A check then runs in this order
+and stops as soon as it is decided:
+
+1. static excludes and the expansion of the static ActionNeeds (including
+   ``superuser_access``),
+2. excludes of the other generators,
+3. static needs,
+4. needs of the other generators, in order.
+
+The needs of the generators are the ones of their
+:meth:`~invenio_records_permissions.generators.Generator.need_set`. Needs
+returned as a :class:`~invenio_records_permissions.generators.NeedSet` are
+intersected with the Needs of the identity.
+
+The decision is the one of
+:meth:`~invenio_records_permissions.policies.base.BasePermissionPolicy.allows`:
+the needs of the non-static generators which may return ActionNeeds (see
+:attr:`~invenio_records_permissions.generators.Generator.returns_action_needs`)
+are always evaluated, as the deny grants of these actions exclude the
+identity.
+"""
+
+from invenio_access.permissions import superuser_access
+
+from ..generators import Generator, NeedSet
+from ..tracing import call_generator
+
+
+def _is_action(need):
+    return need.method == "action"
+
+
+class CompiledAction(object):
+    """Precompiled permission check for the action of a policy."""
+
+    def __init__(self, policy):
+        """Constructor.
+
+        :param policy: Policy instance of the action to compile. It is also
+            used to expand the ActionNeeds.
+        """
+        needs, excludes, generators = policy._split_generators(
+            policy.action, policy.generators
+        )
+        self.policy_cls = type(policy)
+        self.action = policy.action
+        self.source = policy.generators
+        self.needs = frozenset(n for n in needs if not _is_action(n))
+        self.excludes = frozenset(n for n in excludes if not _is_action(n))
+        self.action_needs = frozenset(
+            {superuser_access} | {n for n in needs if _is_action(n)}
+        )
+        self.action_excludes = frozenset(n for n in excludes if _is_action(n))
+        self.generators = tuple(generators)
+        self.action_generators = tuple(
+            g for g in self.generators if g.returns_action_needs
+        )
+        # The generators only overriding ``needs`` are called as such
+        self.needs_methods = tuple(
+            "needs" if type(g).need_set is Generator.need_set else "need_set"
+            for g in self.generators
+        )
+        self._expand_action = policy._expand_action
+
+    def __call__(self, identity, **over):
+        """Check if ``identity`` is allowed.
+
+        :param identity: The identity to check.
+        :param over: The arguments the policy would be instantiated with.
+        """
+        return self.allows(identity, over, self._expand_action)
+
+    def static_check(self, identity, expand):
+        """Check ``identity`` against the static Needs and ActionNeeds.
+
+        :param identity: The identity to check.
+        :param expand: Function expanding an ActionNeed into a
+            ``(needs, excludes)`` pair.
+        :returns: A tuple ``(excluded, allowed, has_needs)``: whether one of
+            the excludes is provided, one of the needs is provided and
+            whether there is any need.
+        """
+        provides = identity.provides
+
+        if not self.excludes.isdisjoint(provides):
+            return True, False, bool(self.needs)
+
+        allowed = not self.needs.isdisjoint(provides)
+        has_needs = bool(self.needs)
+        for action_need in self.action_needs | self.action_excludes:
+            expanded = expand(action_need)
+            if expanded.excludes and not expanded.excludes.isdisjoint(provides):
+                return True, False, has_needs
+            if expanded.needs:
+                has_needs = True
+                allowed = allowed or not expanded.needs.isdisjoint(provides)
+        return False, allowed, has_needs
+
+    def allows(self, identity, over, expand, tracer=None, call=None):
+        """Check if ``identity`` is allowed.
+
+        :param identity: The identity to check.
+        :param over: The arguments the policy would be instantiated with.
+        :param expand: Function expanding an ActionNeed into a
+            ``(needs, excludes)`` pair.
+        :param tracer: Tracer of the generator calls, see
+            :mod:`~invenio_records_permissions.tracing`.
+        :param call: Function ``call(generator, method)`` returning the result
+            of ``method`` of ``generator`` over ``over``, used instead of
+            calling it (and tracing the call) directly.
+        """
+        provides = identity.provides
+
+        excluded, allowed, has_needs = self.static_check(identity, expand)
+        if excluded:
+            return False
+
+        for generator in self.generators:
+            if call is not None:
+                excludes = call(generator, "excludes")
+            elif tracer is None:
+                excludes = generator.excludes(**over)
+            else:
+                excludes = call_generator(
+                    tracer, self.policy_cls, self.action, generator, "excludes", over
+                )
+            if isinstance(excludes, NeedSet):
+                if not excludes.isdisjoint(provides):
+                    return False
+                continue
+            for need in excludes:
+                if not _is_action(need):
+                    if need in provides:
+                        return False
+                    continue
+                expanded = expand(need)
+                if expanded.excludes and not expanded.excludes.isdisjoint(provides):
+                    return False
+                if expanded.needs:
+                    has_needs = True
+                    allowed = allowed or not expanded.needs.isdisjoint(provides)
+
+        # Once allowed, the needs of the generators which may return
+        # ActionNeeds are still evaluated, to apply the deny grants of these
+        # actions.
+        if allowed and not self.action_generators:
+            return True
+
+        action_needs = self.action_needs
+        for generator, method in zip(self.generators, self.needs_methods):
+            exhaustive = generator.returns_action_needs
+            if allowed and not exhaustive:
+                continue
+            if call is not None:
+                needs = call(generator, method)
+            elif tracer is None:
+                needs = getattr(generator, method)(**over)
+            else:
+                needs = call_generator(
+                    tracer, self.policy_cls, self.action, generator, method, over
+                )
+            if isinstance(needs, NeedSet):
+                allowed = allowed or not needs.isdisjoint(provides)
+                has_needs = has_needs or bool(needs)
+                continue
+            for need in needs:
+                if not _is_action(need):
+                    allowed = allowed or need in provides
+                    has_needs = True
+                else:
+                    action_needs = action_needs | {need}
+                    expanded = expand(need)
+                    if expanded.excludes and not expanded.excludes.isdisjoint(provides):
+                        return False
+                    if expanded.needs:
+                        has_needs = True
+                        allowed = allowed or not expanded.needs.isdisjoint(provides)
+                if allowed and not exhaustive:
+                    break
+
+        if allowed:
+            return True
+
+        # Without any need, only the ActionNeeds themselves grant permission
+        # (see ``invenio_access.Permission._load_permissions``).
+        return not has_needs and not action_needs.isdisjoint(provides)
+
+
+class CompiledPolicy(object):
+    """Compiled actions of a policy, compiled at first use."""
+
+    def __init__(self, policy_cls):
+        """Constructor."""
+        self.policy_cls = policy_cls
+        self._actions = {}
+
+    def __getitem__(self, action):
+        """Compiled check of ``action``."""
+        compiled = self._actions.get(action)
+        if compiled is not None:
+            # Recompile if the generators of the action have been replaced
+            generators = self.policy_cls._generators_for(compiled.action)
+            if compiled.source is not generators:
+                compiled = None
+        if compiled is None:
+            compiled = CompiledAction(self.policy_cls(action))
+            self._actions[action] = compiled
+        return compiled
+
+    def allows(self, action, identity, **over):
+        """Check if ``identity`` can do ``action``."""
+        return self[action](identity, **over)
+
+
+def compile_policy(policy_cls, actions=None):
+    """Compile the actions of a policy.
+
+    :param policy_cls: The policy class.
+    :param actions: Actions compiled right away, defaults to every
+        ``can_<action>`` of the policy. Other actions are compiled at first
+        use.
+    :returns: A :class:`CompiledPolicy`.
+    """
+    compiled = CompiledPolicy(policy_cls)
+    if actions is None:
+        actions = [name[4:] for name in dir(policy_cls) if name.startswith("can_")]
+    for action in actions:
+        compiled[action]
+    return compiled
@@ -13,7 +13,7 @@ import six
 from flask import current_app
 from werkzeug.utils import import_string
 
-from ..errors import UnknownGeneratorError
+from ..errors import UnknownGeneratorError, UnknownPolicyError
 from ..generators import Admin, AnyUser, AnyUserIfPublic, Disable, RecordOwners
 from .base import BasePermissionPolicy
 
@@ -45,6 +45,8 @@ def obj_or_import_string(value, default=None):
 class RecordPermissionPolicy(BasePermissionPolicy):
     """Access control configuration for records."""
 
+    __slots__ = ("original_action",)
+
     NEED_LABEL_TO_ACTION = {
         "bucket-update": "update_files",
         "bucket-read": "read_files",
@@ -73,13 +75,62 @@ class RecordPermissionPolicy(BasePermissionPolicy):
         super().__init__(action, **over)
 
 
+def resolve_permission_policy(value, name="record"):
+    """Import and validate a permission policy.
+
+    :param value: Policy class or import path.
+    :param name: Name of the policy, for error messages.
+    :raises ~invenio_records_permissions.errors.UnknownPolicyError: If the
+        policy cannot be imported or is not a
+        :class:`~invenio_records_permissions.policies.base.BasePermissionPolicy`.
+    """
+    try:
+        policy_cls = obj_or_import_string(value)
+    except ImportError as e:
+        raise UnknownPolicyError(
+            "Permission policy {name} cannot be imported: {error}".format(
+                name=name, error=e
+            )
+        )
+    if not isinstance(policy_cls, type) or not issubclass(
+        policy_cls, BasePermissionPolicy
+    ):
+        raise UnknownPolicyError(
+            "Permission policy {name} is not a BasePermissionPolicy: {value}".format(
+                name=name, value=value
+            )
+        )
+    return policy_cls
+
+
+def get_permission_policy(name):
+    """Return the permission policy registered as ``name``.
+
+    See ``RECORDS_PERMISSIONS_POLICIES``.
+
+    :raises ~invenio_records_permissions.errors.UnknownPolicyError: If no
+        policy is registered as ``name``.
+    """
+    policies = current_app.extensions["invenio-records-permissions"].policies
+    try:
+        return policies[name]
+    except KeyError:
+        raise UnknownPolicyError(
+            "No permission policy registered as {name}.".format(name=name)
+        )
+
+
 def get_record_permission_policy():
     """Return RecordPermissionPolicy.
 
     Relies on ``RECORDS_PERMISSIONS_RECORD_POLICY`` to
-    automatically configure functionality.
+    automatically configure functionality. The policy is resolved once per
+    application (and again if the configuration changes).
     """
-    return obj_or_import_string(
-        current_app.config.get("RECORDS_PERMISSIONS_RECORD_POLICY"),
-        default=RecordPermissionPolicy,
-    )
+    value = current_app.config.get("RECORDS_PERMISSIONS_RECORD_POLICY")
+    ext = current_app.extensions.get("invenio-records-permissions")
+    if ext is None:
+        return obj_or_import_string(value, default=RecordPermissionPolicy)
+    if ext.record_policy_source is not value:
+        ext.register_record_policy(value)
+    return ext.policies["record"]
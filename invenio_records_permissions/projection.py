@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Minimal record projections for the permission checks.
+
+Generators declare the paths of the record they read (see
+:attr:`~invenio_records_permissions.generators.Generator.record_paths`), so
+that a policy can be checked over a projection of the record holding only
+these paths instead of the whole record:
+
+.. code-block:: python
+
+    paths = RecordPermissionPolicy.record_paths("read")
+    records = query_projections(paths, record_ids)
+    RecordPermissionPolicy.bulk_can("read", identity, records)
+"""
+
+from invenio_db import db
+from invenio_records.models import RecordMetadata
+
+
+def _split(path):
+    """Keys of a dotted ``path``."""
+    return tuple(path.split("."))
+
+
+def _set_path(projection, keys, value):
+    """Set ``value`` at ``keys`` in the nested dict ``projection``."""
+    for key in keys[:-1]:
+        projection = projection.setdefault(key, {})
+    projection[keys[-1]] = value
+
+
+def project(record, paths):
+    """Projection of ``record`` on the dotted ``paths``.
+
+    :returns: A nested dict holding only the values of ``record`` at
+        ``paths``, e.g. ``{"_access": {"metadata_restricted": True}}`` for
+        the ``_access.metadata_restricted`` path. Missing paths are skipped.
+    """
+    projection = {}
+    for path in paths:
+        keys = _split(path)
+        value = record
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            _set_path(projection, keys, value)
+    return projection
+
+
+def query_projections(paths, ids, model_cls=RecordMetadata):
+    """Fetch the projections of the records ``ids`` from the database.
+
+    Only the JSON values at ``paths`` are selected, instead of the whole
+    records.
+
+    :param paths: Dotted paths, e.g. from
+        :meth:`~invenio_records_permissions.policies.base.BasePermissionPolicy.record_paths`.
+    :param ids: Identifiers of the records.
+    :param model_cls: Model of the records.
+    :returns: A list of projections, in the order of ``ids``. Records that
+        do not exist or are deleted are skipped.
+    """
+    paths = sorted(paths)
+    ids = list(ids)
+    columns = [model_cls.json[_split(path)] for path in paths]
+    rows = (
+        db.session.query(model_cls.id, *columns)
+        .filter(model_cls.id.in_(ids), model_cls.json.isnot(None))
+        .all()
+    )
+    projections = {}
+    for row_id, *values in rows:
+        projection = projections[str(row_id)] = {}
+        for path, value in zip(paths, values):
+            # JSON null and missing values are not distinguished
+            if value is not None:
+                _set_path(projection, _split(path), value)
+    return [projections[str(id_)] for id_ in ids if str(id_) in projections]
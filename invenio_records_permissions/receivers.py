@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Invenio Records Permissions signal receivers."""
+
+from flask import current_app, has_app_context
+from invenio_access import ActionRoles, ActionSystemRoles, ActionUsers
+from invenio_access.permissions import superuser_access
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+_GRANTS_CHANGED = "records_permissions_grants_changed"
+"""Key of the session info marking a transaction which changed grants."""
+
+
+def _clear_caches(*names):
+    """Clear the named caches of the current app."""
+    if not has_app_context():
+        return
+    ext = current_app.extensions.get("invenio-records-permissions")
+    for name in names:
+        cache = getattr(ext, name, None)
+        if cache is not None:
+            cache.clear()
+
+
+def _mark_grants_changed(target):
+    """Mark the transaction of ``target`` as changing the grants."""
+    session = object_session(target)
+    if session is not None:
+        session.info[_GRANTS_CHANGED] = True
+
+
+def invalidate_superuser_cache(mapper, connection, target):
+    """Clear the caches depending on the inserted or deleted grant.
+
+    The cached filters depend on all the grants (see
+    :func:`~invenio_records_permissions.indexing.identity_action_needs`), the
+    cached superusers only on superuser-access ones.
+    """
+    _mark_grants_changed(target)
+    if target.action == superuser_access.value:
+        _clear_caches("superuser_cache", "filter_cache", "expansion_cache")
+    else:
+        _clear_caches("filter_cache", "expansion_cache")
+
+
+def invalidate_superuser_cache_on_update(mapper, connection, target):
+    """Clear the caches when any grant is updated.
+
+    The action of the grant may have been changed from or to superuser-access.
+    """
+    _mark_grants_changed(target)
+    _clear_caches("superuser_cache", "filter_cache", "expansion_cache")
+
+
+def bump_grants_version(session):
+    """Change the grants version once a transaction changing them commits.
+
+    The caches of the other workers sharing the version are then cleared, see
+    ``RECORDS_PERMISSIONS_GRANTS_VERSION_FILE``.
+    """
+    if not session.info.pop(_GRANTS_CHANGED, False) or not has_app_context():
+        return
+    ext = current_app.extensions.get("invenio-records-permissions")
+    version = getattr(ext, "grants_version", None)
+    if version is not None:
+        version.bump()
+
+
+def forget_grants_changes(session):
+    """Forget the grant changes of a rolled back transaction."""
+    session.info.pop(_GRANTS_CHANGED, None)
+
+
+def register_cache_invalidation():
+    """Listen to changes of the action grant models."""
+    for model in (ActionRoles, ActionSystemRoles, ActionUsers):
+        for identifier, receiver in (
+            ("after_insert", invalidate_superuser_cache),
+            ("after_delete", invalidate_superuser_cache),
+            ("after_update", invalidate_superuser_cache_on_update),
+        ):
+            if not event.contains(model, identifier, receiver):
+                event.listen(model, identifier, receiver)
+    for identifier, receiver in (
+        ("after_commit", bump_grants_version),
+        ("after_rollback", forget_grants_changes),
+    ):
+        if not event.contains(Session, identifier, receiver):
+            event.listen(Session, identifier, receiver)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Lazy access to the search DSL.
+
+Importing :mod:`invenio_search.engine` loads the search client and its DSL,
+which processes only checking permissions (e.g. CLI commands and Celery
+workers) never use. The ``dsl`` module is hence imported on first use, when a
+query filter is built.
+"""
+
+import importlib
+
+
+class _LazyDSL(object):
+    """Proxy of ``invenio_search.engine.dsl``, imported on first use."""
+
+    __slots__ = ("_dsl",)
+
+    def __init__(self):
+        """Constructor."""
+        self._dsl = None
+
+    def __getattr__(self, name):
+        """Attribute ``name`` of the DSL."""
+        if self._dsl is None:
+            self._dsl = importlib.import_module("invenio_search.engine").dsl
+        return getattr(self._dsl, name)
+
+
+dsl = _LazyDSL()
+"""The search engine DSL (``invenio_search.engine.dsl``), imported lazily."""
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Instrumentation of the permission evaluation.
+
+A tracer is a callable configured with ``RECORDS_PERMISSIONS_TRACER``:
+
+.. code-block:: python
+
+    def tracer(event, duration, queries=0, **info):
+        ...
+
+It is called at the end of each traced span with:
+
+- ``event``: one of ``"allows"``, ``"needs"``, ``"excludes"``,
+  ``"query_filters"``, ``"load_permissions"``, ``"expand_action"`` and
+  ``"generator"``,
+- ``duration``: the wall-clock seconds spent in the span,
+- ``queries``: the number of SQL queries issued in the span,
+- ``info``: ``policy`` (class) and ``action`` of the policy, plus
+  ``generator`` (instance) and ``method`` for generator events and ``need``
+  for ``expand_action`` events.
+
+Spans nest, e.g. the ``generator`` spans of a check are within its
+``allows`` span. When no application configures a tracer, the only cost is a
+global flag lookup per traced span.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_enabled = False
+_local = threading.local()
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    """Count the queries issued by the current thread."""
+    _local.queries = getattr(_local, "queries", 0) + 1
+
+
+def enable():
+    """Enable tracing, done when an application configures a tracer."""
+    global _enabled
+    if not event.contains(Engine, "before_cursor_execute", _count_query):
+        event.listen(Engine, "before_cursor_execute", _count_query)
+    _enabled = True
+
+
+def current_tracer():
+    """Tracer of the current application or None."""
+    if not _enabled or not has_app_context():
+        return None
+    ext = current_app.extensions.get("invenio-records-permissions")
+    return getattr(ext, "tracer", None)
+
+
+@contextmanager
+def trace(tracer, event, **info):
+    """Report the duration and SQL queries of the block to ``tracer``."""
+    queries = getattr(_local, "queries", 0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        queries = getattr(_local, "queries", 0) - queries
+        tracer(event, duration, queries=queries, **info)
+
+
+def call_generator(tracer, policy_cls, action, generator, method, over):
+    """Call ``method`` of ``generator`` within a ``generator`` span."""
+    with trace(
+        tracer,
+        "generator",
+        policy=policy_cls,
+        action=action,
+        generator=generator,
+        method=method,
+    ):
+        return getattr(generator, method)(**over)
+
+
+def traced(event):
+    """Decorator tracing a method of a policy as ``event``."""
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(policy, *args, **kwargs):
+            tracer = current_tracer() if _enabled else None
+            if tracer is None:
+                return method(policy, *args, **kwargs)
+            with trace(tracer, event, policy=type(policy), action=policy.action):
+                return method(policy, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
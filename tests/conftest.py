@@ -13,13 +13,36 @@ See https://pytest-invenio.readthedocs.io/ for documentation on which test
 fixtures are available.
 """
 
+from contextlib import contextmanager
+
 import pytest
-from flask_principal import RoleNeed
+from flask_principal import RoleNeed, UserNeed
 from invenio_access.models import ActionRoles
 from invenio_access.permissions import superuser_access
 from invenio_accounts.models import Role
 from invenio_app.factory import create_app as _create_app
 from invenio_records.api import Record
+from sqlalchemy import event
+
+from invenio_records_permissions.generators import AnyUserIfPublic, RecordOwners
+
+
+class PublicIfNotEmbargoed(AnyUserIfPublic):
+    """Subclass of a generator overriding its needs, not its declarations."""
+
+    def needs(self, record=None, **kwargs):
+        """Enabling Needs, none if the record is embargoed."""
+        if record.get("embargoed"):
+            return []
+        return super().needs(record=record, **kwargs)
+
+
+class RecordCreators(RecordOwners):
+    """Subclass of a generator reading other fields of the record."""
+
+    def needs(self, record=None, **kwargs):
+        """Enabling Needs of the creators."""
+        return [UserNeed(creator) for creator in record.get("creators", [])]
 
 
 @pytest.fixture(scope="module")
@@ -31,12 +54,31 @@ def celery_config():
     return {}
 
 
+@pytest.fixture(scope="module")
+def app_config(app_config, tmp_path_factory):
+    """Share the version of the action grants through a file."""
+    path = tmp_path_factory.mktemp("grants") / "version"
+    app_config["RECORDS_PERMISSIONS_GRANTS_VERSION_FILE"] = str(path)
+    return app_config
+
+
 @pytest.fixture(scope="module")
 def create_app():
     """Application factory fixture."""
     return _create_app
 
 
+@pytest.fixture(scope="function", autouse=True)
+def clear_permissions_caches(request):
+    """Clear the caches of the module-scoped app.
+
+    The database is recreated for each test, which the caches don't notice.
+    """
+    if "app" in request.fixturenames:
+        app = request.getfixturevalue("app")
+        app.extensions["invenio-records-permissions"].grants_version.bump()
+
+
 @pytest.fixture(scope="function")
 def superusers_role(db):
     """Grant `superuser_access` action to the new role."""
@@ -47,6 +89,26 @@ def superusers_role(db):
     return superusers
 
 
+@pytest.fixture(scope="function")
+def count_queries(db):
+    """Context manager collecting the SQL statements issued inside it."""
+
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def _before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _before_cursor_execute)
+
+    return _count_queries
+
+
 @pytest.fixture(scope="function")
 def superusers_role_need(superusers_role):
     """Superuser role fixture."""
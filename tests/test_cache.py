@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Cache tests."""
+
+import builtins
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask_principal import Identity, RoleNeed, UserNeed
+from invenio_access.permissions import any_user
+
+from invenio_records_permissions.cache import (
+    FileVersion,
+    MemoryVersion,
+    TTLCache,
+    identity_fingerprint,
+)
+
+
+def test_ttl_cache():
+    now = [0]
+    cache = TTLCache(ttl=10, timer=lambda: now[0])
+
+    assert cache.get("key") is None
+    assert cache.get("key", default=[]) == []
+
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    now[0] = 10
+    assert cache.get("key") is None
+
+    cache.set("key", "value")
+    cache.delete("key")
+    assert cache.get("key") is None
+
+    cache.set("key", "value")
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ttl_cache_without_expiry():
+    now = [0]
+    cache = TTLCache(timer=lambda: now[0])
+
+    cache.set("key", "value")
+    now[0] = 10**6
+    assert cache.get("key") == "value"
+
+
+def test_ttl_cache_lru():
+    cache = TTLCache(maxsize=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2}
+
+
+def test_ttl_cache_version(tmp_path):
+    for version in (MemoryVersion(), FileVersion(str(tmp_path / "version"))):
+        cache = TTLCache(version=version)
+        other_cache = TTLCache(version=version)
+        cache.set("key", "value")
+        other_cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        version.bump()
+        assert cache.get("key") is None
+        assert other_cache.get("key") is None
+
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+
+def test_file_version_shared(tmp_path):
+    path = str(tmp_path / "version")
+    version, other_version = FileVersion(path), FileVersion(path)
+    assert version.get() is None
+
+    other_version.bump()
+    assert version.get() is not None
+    assert version.get() == other_version.get()
+
+
+def test_file_version_concurrent_bumps(tmp_path):
+    version = FileVersion(str(tmp_path / "version"))
+
+    def bump():
+        for _ in range(25):
+            version.bump()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for future in [executor.submit(bump) for _ in range(4)]:
+            future.result()
+    assert version.get() is not None
+    assert os.listdir(str(tmp_path)) == ["version"]
+
+
+def test_file_version_read_on_change(tmp_path, mocker):
+    path = str(tmp_path / "version")
+    version, other_version = FileVersion(path), FileVersion(path)
+    other_version.bump()
+    value = version.get()
+
+    spy = mocker.spy(builtins, "open")
+    assert version.get() == value
+    assert spy.call_count == 0
+    other_version.bump()
+    assert version.get() != value
+    assert spy.call_count == 1
+
+
+def test_identity_fingerprint():
+    identity = Identity(1)
+    identity.provides.update([UserNeed(1), any_user])
+    other = Identity(1)
+    other.provides.update([any_user, UserNeed(1)])
+    assert identity_fingerprint(identity) == identity_fingerprint(other)
+
+    other.provides.add(RoleNeed("curators"))
+    assert identity_fingerprint(identity) != identity_fingerprint(other)
+    # Not the same as the id 1 of a role
+    identity.provides.add(RoleNeed(1))
+    assert identity_fingerprint(identity) != identity_fingerprint(other)
+
+    # Swapping a Need for another one changes the fingerprint
+    fingerprint = identity_fingerprint(identity)
+    identity.provides.remove(RoleNeed(1))
+    identity.provides.add(RoleNeed(2))
+    assert identity_fingerprint(identity) != fingerprint
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+import pytest
+from conftest import PublicIfNotEmbargoed
+from flask_principal import Identity, RoleNeed, UserNeed
+from invenio_access.permissions import any_user, authenticated_user
+
+from invenio_records_permissions.generators import (
+    AllowedByAccessLevel,
+    AnyUserIfPublic,
+    Generator,
+    RecordOwners,
+    SystemProcess,
+)
+from invenio_records_permissions.policies import (
+    BasePermissionPolicy,
+    RecordPermissionPolicy,
+)
+
+np = pytest.importorskip("numpy")
+columnar = pytest.importorskip("invenio_records_permissions.columnar")
+
+
+class AccessLevelsPolicy(RecordPermissionPolicy):
+    can_read = [AllowedByAccessLevel(), RecordOwners(), SystemProcess()]
+
+
+def _records():
+    records = []
+    for i in range(24):
+        record = {
+            "owners": [o for o in (1, 2, 3) if i % (o + 1) == 0],
+            "_access": {"metadata_restricted": i % 3 != 0},
+        }
+        if i % 4 == 0:
+            record["internal"] = {
+                "access_levels": {
+                    "metadata_curator": [
+                        {"scheme": "person", "id": 4},
+                        {"scheme": "role", "id": "curators"} if i % 8 else {},
+                    ]
+                }
+            }
+        records.append(record)
+    return records
+
+
+def _identities():
+    anonymous = Identity(None)
+    anonymous.provides.add(any_user)
+    identities = [anonymous]
+    for user_id, role in ((1, None), (3, "curators"), (4, None), (5, "superusers")):
+        identity = Identity(user_id)
+        identity.provides.update([any_user, authenticated_user, UserNeed(user_id)])
+        if role:
+            identity.provides.add(RoleNeed(role))
+        identities.append(identity)
+    return identities
+
+
+def test_bulk_can(app, superusers_role_need):
+    records = _records()
+    batch = columnar.RecordBatch(records)
+
+    results = set()
+    for identity in _identities():
+        for policy_cls, action in (
+            (RecordPermissionPolicy, "read"),
+            (RecordPermissionPolicy, "read_files"),
+            (RecordPermissionPolicy, "update"),
+            (RecordPermissionPolicy, "delete"),
+            (RecordPermissionPolicy, "create"),
+            (AccessLevelsPolicy, "read"),
+        ):
+            expected = policy_cls.bulk_can(action, identity, records)
+            allowed = columnar.bulk_can(policy_cls, action, identity, batch)
+            assert allowed.tolist() == expected, (policy_cls, action, identity)
+            results.add(tuple(expected))
+    # Records are allowed and denied
+    assert len(results) > 5
+
+
+def test_record_batch_columns():
+    batch = columnar.RecordBatch(
+        [{"owners": [1, 2]}, {"owners": []}, {"owners": [2]}, {}]
+    )
+    owners = batch.needs("owners", lambda record: RecordOwners().needs(record=record))
+    assert owners.offsets.tolist() == [0, 2, 2, 3, 3]
+    assert owners.codes.tolist() == [0, 1, 1]
+    assert owners.nonempty().tolist() == [True, False, True, False]
+    assert owners.intersects({UserNeed(2)}).tolist() == [True, False, True, False]
+    assert owners.intersects({UserNeed(3)}).tolist() == [False] * 4
+    # Columns are computed once per batch
+    assert batch.needs("owners", None) is owners
+
+    public, has_needs = AnyUserIfPublic().needs_mask(batch, Identity(1))
+    assert public.tolist() == [False] * 4
+    assert has_needs.tolist() == [True] * 4
+
+
+def test_bulk_can_subclass(app):
+    # The masks of the parent do not describe the new needs
+    assert PublicIfNotEmbargoed().needs_mask(None, None) is None
+
+    class Policy(BasePermissionPolicy):
+        can_read = [PublicIfNotEmbargoed()]
+
+    records = [{"embargoed": True}, {}]
+    identity = Identity(None)
+    identity.provides.add(any_user)
+    allowed = columnar.bulk_can(Policy, "read", identity, records)
+    assert allowed.tolist() == Policy.bulk_can("read", identity, records)
+    assert allowed.tolist() == [False, True]
+
+
+class Unvectorized(Generator):
+    depends_on = ("record",)
+
+    def needs(self, record=None, **kwargs):
+        return [UserNeed(record["creator"])]
+
+
+def test_bulk_can_fallback(app, mocker):
+    class Policy(BasePermissionPolicy):
+        can_read = [RecordOwners(), Unvectorized()]
+
+    records = [{"owners": [1], "creator": 2}, {"owners": [3], "creator": 3}]
+    identity = Identity(2)
+    identity.provides.add(UserNeed(2))
+
+    spy = mocker.spy(Policy, "bulk_can")
+    allowed = columnar.bulk_can(Policy, "read", identity, records)
+    assert allowed.tolist() == [True, False]
+    assert spy.call_count == 1
@@ -10,8 +10,16 @@
 import copy
 
 import pytest
-from flask_principal import ActionNeed, UserNeed, Need
-from invenio_access.permissions import any_user, authenticated_user, system_process
+from flask_principal import ActionNeed, Identity, Need, RoleNeed, UserNeed
+from invenio_access.models import ActionRoles
+from invenio_access.permissions import (
+    any_user,
+    authenticated_user,
+    superuser_access,
+    system_process,
+)
+from invenio_accounts.models import Role
+from invenio_records.api import Record
 
 from invenio_records_permissions.generators import (
     Admin,
@@ -21,8 +29,12 @@ from invenio_records_permissions.generators import (
     AuthenticatedUser,
     Disable,
     Generator,
-    RecordOwners, SystemProcess, SystemProcessWithoutAdmin,
+    NeedSet,
+    RecordOwners,
+    SystemProcess,
+    SystemProcessWithoutAdmin,
 )
+from invenio_records_permissions.policies import BasePermissionPolicy
 
 
 def test_generator():
@@ -82,6 +94,74 @@ def test_system_process_without_admin(mocker, superusers_role_need):
     assert generator.excludes() == [superusers_role_need]
     _test_system_process_query_filter(generator, mocker)
 
+    # System process identity which is also superuser
+    identity = mocker.Mock(provides=[system_process, superusers_role_need])
+    assert generator.query_filter(identity=identity) == []
+
+
+def test_system_process_without_admin_cache(db, superusers_role_need, count_queries):
+    generator = SystemProcessWithoutAdmin()
+
+    assert generator.excludes() == [superusers_role_need]
+    with count_queries() as queries:
+        assert generator.excludes() == [superusers_role_need]
+        assert SystemProcessWithoutAdmin().excludes() == [superusers_role_need]
+    assert queries == []
+
+    # Granting superuser-access invalidates the cache
+    admins = Role(name="admins")
+    db.session.add(admins)
+    db.session.add(ActionRoles.allow(superuser_access, role=admins))
+    db.session.commit()
+
+    assert set(generator.excludes()) == {superusers_role_need, RoleNeed("admins")}
+
+
+def test_depends_on():
+    assert Generator.depends_on is None
+    for generator in (AnyUser, AuthenticatedUser, Admin, Disable, SystemProcess):
+        assert generator.depends_on == ()
+    for generator in (RecordOwners, AnyUserIfPublic, AllowedByAccessLevel):
+        assert generator.depends_on == ("record",)
+    # Its excludes depend on the database
+    assert SystemProcessWithoutAdmin.depends_on is None
+
+
+class OwnerIfAuthenticated(AuthenticatedUser):
+    def needs(self, record=None, **kwargs):
+        return [UserNeed(owner) for owner in record.get("owners", [])]
+
+
+def test_depends_on_subclass(app, create_record):
+    # The declaration of the parent does not describe the new needs
+    assert OwnerIfAuthenticated.depends_on is None
+
+    class Policy(BasePermissionPolicy):
+        can_read = [OwnerIfAuthenticated()]
+
+    identity = Identity(1)
+    identity.provides.add(UserNeed(1))
+    assert Policy("read", record=create_record({"owners": [1]})).allows(identity)
+    assert not Policy("read", record=create_record({"owners": [2]})).allows(identity)
+
+
+def test_generators_shared():
+    assert AnyUser() is AnyUser()
+    assert RecordOwners() is RecordOwners()
+    assert AnyUser() is not AuthenticatedUser()
+    with pytest.raises(AttributeError):
+        AnyUser().depends_on = ("record",)
+
+    # Generators with state are not shared
+    assert AllowedByAccessLevel("read") is not AllowedByAccessLevel("read")
+    assert AllowedByAccessLevel("update").action == "update"
+
+    class StatefulGenerator(Generator):
+        def __init__(self, value=None):
+            self.value = value
+
+    assert StatefulGenerator() is not StatefulGenerator()
+
 
 def test_admin():
     generator = Admin()
@@ -91,6 +171,20 @@ def test_admin():
     assert generator.query_filter() == []
 
 
+def test_admin_query_filter(db, mocker):
+    generator = Admin()
+    admins = Role(name="admins")
+    db.session.add(admins)
+    db.session.add(ActionRoles.allow(ActionNeed("admin-access"), role=admins))
+    db.session.commit()
+
+    identity = mocker.Mock(provides={UserNeed(1)})
+    assert generator.query_filter(identity=identity) == []
+
+    identity = mocker.Mock(provides={UserNeed(1), RoleNeed("admins")})
+    assert generator.query_filter(identity=identity).to_dict() == {"match_all": {}}
+
+
 def test_record_owner(create_record, mocker):
     generator = RecordOwners()
     record = create_record()
@@ -160,6 +254,64 @@ def test_allowedbyaccesslevels_metadata_curator(action, create_record):
     assert generator.excludes(record=record) == []
 
 
+def test_allowedbyaccesslevels_schemes(create_record):
+    record = create_record(
+        {
+            "internal": {
+                "access_levels": {
+                    "metadata_curator": [
+                        {"scheme": "person", "id": 1},
+                        {"scheme": "role", "id": "curators"},
+                        {"scheme": "group", "id": "editors"},
+                        {"scheme": "unknown", "id": 2},
+                        {"scheme": "person"},
+                    ]
+                }
+            }
+        }
+    )
+
+    needs = [UserNeed(1), RoleNeed("curators"), RoleNeed("editors")]
+    assert AllowedByAccessLevel().needs(record=record) == needs
+    need_set = AllowedByAccessLevel().need_set(record=record)
+    assert isinstance(need_set, NeedSet)
+    assert need_set == set(needs)
+
+
+def test_allowedbyaccesslevels_index_cache(app, db, create_record):
+    record = Record.create(
+        create_record(
+            {
+                "internal": {
+                    "access_levels": {
+                        "metadata_curator": [{"scheme": "person", "id": 1}]
+                    }
+                }
+            }
+        )
+    )
+    db.session.commit()
+    index = AllowedByAccessLevel.access_levels_index(record)
+    assert index == {"metadata_curator": {UserNeed(1)}}
+
+    # Computed once per revision
+    assert AllowedByAccessLevel.access_levels_index(record) is index
+    record["internal"]["access_levels"]["metadata_curator"].append(
+        {"scheme": "person", "id": 2}
+    )
+    record.commit()
+    db.session.commit()
+    assert AllowedByAccessLevel().need_set(record=record) == {UserNeed(1), UserNeed(2)}
+
+    # Drafts share the ids and revision ids of the records
+    class Draft(Record):
+        pass
+
+    draft = Draft({}, model=record.model)
+    assert (draft.id, draft.revision_id) == (record.id, record.revision_id)
+    assert AllowedByAccessLevel.access_levels_index(draft) == {}
+
+
 def test_allowedbyaccesslevels_query_filter(mocker):
     # TODO: Test query_filter on the actual search engine instance per #23
 
@@ -176,6 +328,26 @@ def test_allowedbyaccesslevels_query_filter(mocker):
         }
     }
 
+    # User with a role
+    query_filter = generator.query_filter(
+        identity=mocker.Mock(provides=[RoleNeed("curators")])
+    )
+    assert query_filter.to_dict() == {
+        "bool": {
+            "should": [
+                {
+                    "term": {
+                        "internal.access_levels.metadata_curator": {
+                            "scheme": scheme,
+                            "id": "curators",
+                        }
+                    }
+                }
+                for scheme in ("role", "group")
+            ]
+        }
+    }
+
     # User that doesn't provide 'id'
     generator = AllowedByAccessLevel()
     query_filter = generator.query_filter(
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+from flask_principal import ActionNeed, Identity, RoleNeed, UserNeed
+from invenio_access import ActionRoles, ActionSystemRoles
+from invenio_access.permissions import (
+    ParameterizedActionNeed,
+    any_user,
+    authenticated_user,
+)
+from invenio_accounts.models import Role
+from invenio_search.engine import dsl
+
+from invenio_records_permissions.dumpers import PermissionsDumperExt
+from invenio_records_permissions.generators import (
+    AnyUserIfPublic,
+    Generator,
+    RecordOwners,
+    SystemProcessWithoutAdmin,
+)
+from invenio_records_permissions.indexing import (
+    dump_permissions,
+    identity_action_needs,
+    identity_tokens,
+    indexed_query_filter,
+    need_to_token,
+)
+from invenio_records_permissions.policies import BasePermissionPolicy
+
+
+class ActionGenerator(Generator):
+    def needs(self, **kwargs):
+        return [ParameterizedActionNeed("curate", "community")]
+
+
+class IndexedPolicy(BasePermissionPolicy):
+    can_read = [RecordOwners(), AnyUserIfPublic()]
+    can_update = [RecordOwners(), SystemProcessWithoutAdmin()]
+    can_curate = [ActionGenerator()]
+    indexed_actions = ("read", "curate")
+
+
+def test_need_to_token():
+    assert need_to_token(UserNeed(12)) == "user:12"
+    assert need_to_token(RoleNeed("curators")) == "role:curators"
+    assert need_to_token(any_user) == "any_user"
+    assert need_to_token(ActionNeed("admin-access")) == "action:admin-access"
+
+
+def test_dump_permissions(app, create_record):
+    record = create_record({"owners": [1, 2]})
+
+    assert dump_permissions(IndexedPolicy, record, ["read"]) == {
+        "read": ["any_user", "user:1", "user:2"],
+    }
+
+    record["_access"]["metadata_restricted"] = True
+    permissions = dump_permissions(IndexedPolicy, record, ["read", "update"])
+    assert permissions["read"] == ["user:1", "user:2"]
+    assert permissions["update"] == ["system_process", "user:1", "user:2"]
+    assert "update_excludes" not in permissions
+
+    # The action granted without argument is granted for any argument
+    assert dump_permissions(IndexedPolicy, record, ["curate"]) == {
+        "curate": ["action:curate", "action:curate:community"],
+    }
+
+
+def test_identity_action_needs(db):
+    curators = Role(name="curators")
+    db.session.add(curators)
+    db.session.add(ActionRoles.allow(ActionNeed("curate"), role=curators))
+    db.session.add(ActionRoles.allow(ActionNeed("publish"), role=curators))
+    db.session.add(ActionSystemRoles.allow(ActionNeed("browse"), role=any_user))
+    db.session.add(
+        ActionSystemRoles.allow(
+            ParameterizedActionNeed("comment", "1"), role=authenticated_user
+        )
+    )
+    db.session.commit()
+
+    identity = Identity(1)
+    identity.provides.update([RoleNeed("curators"), any_user])
+    assert identity_action_needs(identity) == {
+        ActionNeed("curate"),
+        ActionNeed("publish"),
+        ActionNeed("browse"),
+    }
+
+    identity.provides.add(authenticated_user)
+    assert ParameterizedActionNeed("comment", "1") in identity_action_needs(identity)
+    assert "action:comment:1" in identity_tokens(identity)
+    assert "action:comment:1" not in identity_tokens(identity, actions=False)
+
+    # Denied actions are not granted
+    banned = Role(name="banned")
+    identity.provides.add(RoleNeed("banned"))
+    db.session.add(ActionRoles.deny(ActionNeed("publish"), role=banned))
+    db.session.commit()
+    assert ActionNeed("publish") not in identity_action_needs(identity)
+
+
+def test_permissions_dumper_ext(app, create_record):
+    record = create_record({"owners": [1]})
+    dumper = PermissionsDumperExt(actions=["read"], policy_cls=IndexedPolicy)
+
+    data = {}
+    dumper.dump(record, data)
+    assert data == {"_permissions": {"read": ["any_user", "user:1"]}}
+
+    dumper.load(data, None)
+    assert data == {}
+
+
+def test_indexed_query_filters(db):
+    identity = Identity(1)
+    identity.provides.update([UserNeed(1), any_user])
+
+    assert IndexedPolicy(action="read", identity=identity).query_filters == [
+        indexed_query_filter("read", ["any_user", "user:1"])
+    ]
+    assert indexed_query_filter("read", ["user:1"]) == dsl.Q(
+        "bool",
+        filter=[dsl.Q("terms", **{"_permissions.read": ["user:1"]})],
+        must_not=[dsl.Q("terms", **{"_permissions.read_excludes": ["user:1"]})],
+    )
+
+    # Not indexed actions use the generators
+    assert IndexedPolicy(action="update", identity=identity).query_filters == [
+        dsl.Q("term", **{"owners": 1})
+    ]
+
+
+def test_indexed_query_filters_superuser(app, superuser_identity):
+    policy = IndexedPolicy(action="read", identity=superuser_identity)
+    assert policy.query_filters[-1] == dsl.Q("match_all")
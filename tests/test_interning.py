@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+from flask_principal import RoleNeed, UserNeed
+
+from invenio_records_permissions.generators import RecordOwners
+from invenio_records_permissions.interning import NeedTable
+
+
+def test_need_table():
+    table = NeedTable(maxsize=2)
+    need = table.need(UserNeed, 1)
+    assert need == UserNeed(1)
+    assert table.need(UserNeed, 1) is need
+    assert table.need(RoleNeed, 1) == RoleNeed(1)
+    assert len(table) == 2
+
+    # Needs past the size of the table are created as before
+    assert table.need(UserNeed, 2) == UserNeed(2)
+    assert table.need(UserNeed, 2) is not table.need(UserNeed, 2)
+    assert len(table) == 2
+
+
+def test_generators_intern_needs():
+    record = {"owners": [1, 2]}
+    needs = RecordOwners().needs(record=record)
+    assert needs == [UserNeed(1), UserNeed(2)]
+    assert all(a is b for a, b in zip(needs, RecordOwners().needs(record=record)))
@@ -9,9 +9,20 @@
 
 """Module tests."""
 
+import subprocess
+import sys
+
+import pytest
 from flask import Flask
 
 from invenio_records_permissions import InvenioRecordsPermissions
+from invenio_records_permissions.errors import UnknownPolicyError
+from invenio_records_permissions.policies import (
+    BasePermissionPolicy,
+    RecordPermissionPolicy,
+    get_permission_policy,
+    get_record_permission_policy,
+)
 
 
 def test_version():
@@ -32,3 +43,89 @@ def test_init():
     assert "invenio-records-permissions" not in app.extensions
     ext.init_app(app)
     assert "invenio-records-permissions" in app.extensions
+
+
+def test_init_caches(tmp_path):
+    """The caches of the grants require a shared grants version."""
+    app = Flask("testapp")
+    ext = InvenioRecordsPermissions(app)
+    assert ext.superuser_cache is None
+    assert ext.filter_cache is None
+    assert ext.expansion_cache is None
+
+    app = Flask("testapp")
+    app.config["RECORDS_PERMISSIONS_GRANTS_VERSION_FILE"] = str(tmp_path / "version")
+    ext = InvenioRecordsPermissions(app)
+    assert ext.superuser_cache is not None
+    assert ext.filter_cache is not None
+    assert ext.expansion_cache is not None
+
+
+class CommunityPolicy(BasePermissionPolicy):
+    """Named policy."""
+
+
+def test_init_policies():
+    """Test the resolution of the policies at initialization."""
+    app = Flask("testapp")
+    app.config["RECORDS_PERMISSIONS_POLICIES"] = {
+        "communities": "test_invenio_records_permissions:CommunityPolicy",
+        "records": RecordPermissionPolicy,
+    }
+    ext = InvenioRecordsPermissions(app)
+    assert ext.policies == {
+        "record": RecordPermissionPolicy,
+        "communities": CommunityPolicy,
+        "records": RecordPermissionPolicy,
+    }
+
+    with app.app_context():
+        assert get_permission_policy("communities") is CommunityPolicy
+        assert get_record_permission_policy() is RecordPermissionPolicy
+        with pytest.raises(UnknownPolicyError):
+            get_permission_policy("unknown")
+
+        # Configuration changes are taken into account
+        app.config["RECORDS_PERMISSIONS_RECORD_POLICY"] = CommunityPolicy
+        assert get_record_permission_policy() is CommunityPolicy
+
+
+@pytest.mark.parametrize(
+    "policy", ["invenio_records_permissions.unknown.Policy", "flask.Flask"]
+)
+def test_init_invalid_policies(policy):
+    """Test invalid policies fail at initialization."""
+    app = Flask("testapp")
+    app.config["RECORDS_PERMISSIONS_POLICIES"] = {"invalid": policy}
+    with pytest.raises(UnknownPolicyError):
+        InvenioRecordsPermissions(app)
+
+
+def test_search_dsl_imported_lazily():
+    """The search DSL is imported when building a query filter, not before."""
+    code = (
+        "import sys\n"
+        "from invenio_records_permissions.generators import AnyUserIfPublic\n"
+        "AnyUserIfPublic().needs(record={'_access': {}})\n"
+        "assert 'invenio_search.engine' not in sys.modules\n"
+        "AnyUserIfPublic().query_filter()\n"
+        "assert 'invenio_search.engine' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+    # Cold import time, see benchmarks/bench_import.py
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import invenio_records_permissions",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    modules = [line.rsplit("|", 1)[-1].strip() for line in output.splitlines()]
+    assert "invenio_records_permissions" in modules
+    assert not [m for m in modules if m.startswith(("invenio_search", "opensearch"))]
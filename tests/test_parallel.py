@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from conftest import PublicIfNotEmbargoed, RecordCreators
+from flask_principal import Identity, UserNeed
+from invenio_access.permissions import ParameterizedActionNeed, any_user
+
+from invenio_records_permissions.generators import (
+    RecordOwners,
+    SystemProcessWithoutAdmin,
+)
+from invenio_records_permissions.parallel import (
+    _dump_needs,
+    _load_needs,
+    parallel_bulk_can,
+)
+from invenio_records_permissions.policies import (
+    BasePermissionPolicy,
+    RecordPermissionPolicy,
+)
+
+
+def _records():
+    return [
+        {
+            "owners": [i % 4],
+            "_access": {"metadata_restricted": i % 3 != 0},
+            "metadata": {"title": "Record {}".format(i)},
+        }
+        for i in range(25)
+    ]
+
+
+def test_needs_pickled_as_tuples():
+    needs = {UserNeed(1), any_user, ParameterizedActionNeed("curate", "c1")}
+    dumped = pickle.loads(pickle.dumps(_dump_needs(needs)))
+    assert _load_needs(dumped) == needs
+
+
+def test_parallel_bulk_can(app, superusers_role_need):
+    records = _records()
+    superuser = Identity(5)
+    superuser.provides.update([any_user, superusers_role_need])
+    owner = Identity(1)
+    owner.provides.update([any_user, UserNeed(1)])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for identity in (owner, superuser):
+            for action in ("read", "update", "create"):
+                assert parallel_bulk_can(
+                    RecordPermissionPolicy,
+                    action,
+                    identity,
+                    records,
+                    executor,
+                    shard_size=4,
+                ) == RecordPermissionPolicy.bulk_can(action, identity, records)
+
+
+def test_parallel_bulk_can_processes(app, superusers_role_need):
+    records = _records()
+    identity = Identity(1)
+    identity.provides.update([any_user, UserNeed(1)])
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        allowed = parallel_bulk_can(
+            RecordPermissionPolicy, "read", identity, records, executor, shard_size=7
+        )
+    assert allowed == RecordPermissionPolicy.bulk_can("read", identity, records)
+
+
+class SubclassesPolicy(BasePermissionPolicy):
+    can_read = [PublicIfNotEmbargoed()]
+    can_update = [RecordCreators()]
+
+
+def test_parallel_bulk_can_subclasses(app):
+    # The records are not projected on the paths of the parent generators
+    records = [
+        {"embargoed": True, "creators": [1]},
+        {"_access": {"metadata_restricted": False}, "creators": [2]},
+    ]
+    identity = Identity(1)
+    identity.provides.update([any_user, UserNeed(1)])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for action, expected in (("read", [False, True]), ("update", [True, False])):
+            allowed = parallel_bulk_can(
+                SubclassesPolicy, action, identity, records, executor, shard_size=1
+            )
+            assert allowed == SubclassesPolicy.bulk_can(action, identity, records)
+            assert allowed == expected
+
+
+def test_parallel_bulk_can_database(app, superusers_role_need, mocker):
+    class Policy(BasePermissionPolicy):
+        can_update = [SystemProcessWithoutAdmin(), RecordOwners()]
+
+    records = _records()
+    identity = Identity(1)
+    identity.provides.update([any_user, UserNeed(1)])
+
+    # The generators reading the database are run in the calling process
+    expected = Policy.bulk_can("update", identity, records)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        submit = mocker.spy(executor, "submit")
+        allowed = parallel_bulk_can(
+            Policy, "update", identity, records, executor, shard_size=4
+        )
+    assert allowed == expected
+    assert any(expected)
+    assert submit.call_count == 0
@@ -7,13 +7,37 @@
 # and/or modify it under the terms of the MIT License; see LICENSE file for
 # more details.
 
-from flask_principal import Identity
+import asyncio
+import itertools
+from concurrent.futures import Executor, Future
+
+from flask import Flask, g, request
+from flask_principal import ActionNeed, Identity, RoleNeed, UserNeed
+from invenio_access import ActionRoles
 from invenio_access.permissions import any_user
+from invenio_accounts.models import Role
+from invenio_records.api import Record
 from invenio_search.engine import dsl
 
-from invenio_records_permissions.api import permission_filter
-from invenio_records_permissions.generators import AnyUser, Disable
-from invenio_records_permissions.policies import BasePermissionPolicy
+from invenio_records_permissions import InvenioRecordsPermissions
+from invenio_records_permissions.api import (
+    filter_allowed,
+    normalize_query_filters,
+    permission_filter,
+)
+from invenio_records_permissions.cache import TTLCache
+from invenio_records_permissions.generators import (
+    Admin,
+    AnyUser,
+    AnyUserIfPublic,
+    Disable,
+    Generator,
+    RecordOwners,
+)
+from invenio_records_permissions.policies import (
+    BasePermissionPolicy,
+    RecordPermissionPolicy,
+)
 
 
 def test_base_permission_policy_generators(app):
@@ -109,3 +133,416 @@ def test_permission_filter(mocker):
     permission = mocker.Mock(query_filters=[dsl.Q(), dsl.Q("term", fieldA="valueA")])
     filter_ = permission_filter(permission)
     assert dsl.Q() == filter_
+
+
+def test_permission_policy_needs_excludes_computed_once(
+    superusers_role_need, count_queries
+):
+    permission = TestPermissionPolicy(action="read")
+    identity = Identity(1)
+    identity.provides.add(any_user)
+
+    assert permission.allows(identity)
+    with count_queries() as queries:
+        assert permission.allows(identity)
+        assert permission.needs == {superusers_role_need, any_user}
+        assert permission.excludes == set()
+    assert queries == []
+
+
+def test_permission_policy_invalidate(create_record, superusers_role_need):
+    class OwnersPolicy(BasePermissionPolicy):
+        can_update = [RecordOwners()]
+
+    record = create_record({"owners": [1]})
+    permission = OwnersPolicy(action="update", record=record)
+    assert permission.needs == {superusers_role_need, UserNeed(1)}
+
+    record["owners"] = [2]
+    assert permission.needs == {superusers_role_need, UserNeed(1)}
+
+    permission.invalidate()
+    assert permission.needs == {superusers_role_need, UserNeed(2)}
+
+
+def test_permission_policy_bulk_can(create_record, superusers_role, count_queries):
+    class ReadPolicy(BasePermissionPolicy):
+        can_read = [AnyUserIfPublic(), RecordOwners(), Admin()]
+
+    public = create_record({"owners": [2]})
+    restricted = create_record(
+        {"owners": [1], "_access": {"metadata_restricted": True}}
+    )
+    other = create_record({"owners": [2], "_access": {"metadata_restricted": True}})
+    identity = Identity(1)
+    identity.provides.update({any_user, UserNeed(1)})
+
+    assert ReadPolicy.bulk_can("read", identity, []) == []
+    assert ReadPolicy.bulk_can("read", identity, [public, restricted, other]) == [
+        True,
+        True,
+        False,
+    ]
+
+    # ActionNeeds are expanded once per batch
+    with count_queries() as queries:
+        ReadPolicy.bulk_can("read", identity, [other])
+    with count_queries() as batch_queries:
+        ReadPolicy.bulk_can("read", identity, [other] * 10)
+    assert len(batch_queries) == len(queries)
+
+
+def test_permission_policy_static_generators(create_record, superusers_role_need):
+    class CountingGenerator(Generator):
+        depends_on = ()
+        calls = 0
+
+        def needs(self, **kwargs):
+            CountingGenerator.calls += 1
+            return [any_user]
+
+    class StaticPolicy(BasePermissionPolicy):
+        can_read = [CountingGenerator(), RecordOwners()]
+
+    for owner in (1, 2):
+        permission = StaticPolicy(
+            action="read", record=create_record({"owners": [owner]})
+        )
+        assert permission.needs == {superusers_role_need, any_user, UserNeed(owner)}
+
+    assert CountingGenerator.calls == 1
+
+
+def test_permission_policy_allowed_actions(
+    app, create_record, superusers_role, count_queries, mocker, monkeypatch
+):
+    actions = ["read", "update", "delete", "read_files", "update_files"]
+    record = create_record({"owners": [1], "_access": {"metadata_restricted": True}})
+    identity = Identity(1)
+    identity.provides.update({any_user, UserNeed(1)})
+
+    expected = {
+        action: RecordPermissionPolicy(action=action, record=record).allows(identity)
+        for action in actions
+    }
+    assert expected == {
+        "read": True,
+        "update": True,
+        "delete": False,
+        "read_files": True,
+        "update_files": True,
+    }
+
+    # superuser-access and admin-access are expanded once for all the actions
+    ext = app.extensions["invenio-records-permissions"]
+    monkeypatch.setattr(ext, "expansion_cache", None)
+    with count_queries() as delete_queries:
+        RecordPermissionPolicy(action="delete", record=record).allows(identity)
+    owners_needs = mocker.spy(RecordOwners, "needs")
+    with count_queries() as queries:
+        allowed = RecordPermissionPolicy.allowed_actions(
+            actions, identity, record=record
+        )
+    assert allowed == expected
+    assert owners_needs.call_count == 1
+    assert len(queries) == len(delete_queries)
+
+
+def test_permission_policy_short_circuit(create_record, superusers_role, mocker):
+    class ReadPolicy(BasePermissionPolicy):
+        can_read = [AnyUserIfPublic(), RecordOwners()]
+
+    identity = Identity(1)
+    identity.provides.update({any_user, UserNeed(1)})
+    owners_needs = mocker.spy(RecordOwners, "needs")
+
+    assert ReadPolicy(action="read", record=create_record()).allows(identity)
+    assert owners_needs.call_count == 0
+
+    restricted = create_record({"_access": {"metadata_restricted": True}})
+    assert ReadPolicy(action="read", record=restricted).allows(identity)
+    assert owners_needs.call_count == 1
+
+    ReadPolicy.short_circuit = False
+    assert ReadPolicy(action="read", record=create_record()).allows(identity)
+    assert owners_needs.call_count == 2
+
+
+class EditorsIfPublished(Generator):
+    """Dynamic generator returning an ActionNeed."""
+
+    def needs(self, record=None, **kwargs):
+        return [ActionNeed("edit-access")] if record.get("published") else []
+
+
+def test_permission_policy_short_circuit_action_denials(app, db, create_record):
+    class ReadPolicy(BasePermissionPolicy):
+        can_read = [AnyUser(), EditorsIfPublished()]
+
+    banned = Role(name="banned")
+    db.session.add(banned)
+    db.session.add(ActionRoles.deny(ActionNeed("edit-access"), role=banned))
+    db.session.commit()
+
+    identity = Identity(1)
+    identity.provides.update({any_user, RoleNeed("banned")})
+    record = create_record({"published": True})
+
+    # The deny grant applies even though AnyUser allowed the identity
+    assert not ReadPolicy(action="read", record=record).allows(identity)
+    ReadPolicy.short_circuit = False
+    assert not ReadPolicy(action="read", record=record).allows(identity)
+    ReadPolicy.short_circuit = True
+    assert ReadPolicy(action="read", record=create_record()).allows(identity)
+
+
+def test_permission_policy_expansion_cache(
+    app, db, superusers_role_need, count_queries
+):
+    class AdminPolicy(BasePermissionPolicy):
+        can_read = [Admin()]
+
+    identity = Identity(1)
+    identity.provides.add(RoleNeed("admins"))
+
+    assert not AdminPolicy(action="read").allows(identity)
+    with count_queries() as queries:
+        assert not AdminPolicy(action="read").allows(identity)
+    assert queries == []
+
+    # Committing a grant changes the version shared by the workers
+    grants_version = app.extensions["invenio-records-permissions"].grants_version
+    version = grants_version.get()
+    admins = Role(name="admins")
+    db.session.add(admins)
+    db.session.add(ActionRoles.allow(ActionNeed("admin-access"), role=admins))
+    db.session.commit()
+    assert grants_version.get() != version
+
+    assert AdminPolicy(action="read").allows(identity)
+
+
+class InlineExecutor(Executor):
+    """Executor running the calls in the current thread.
+
+    The connection of the test database is bound to the main thread.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls += 1
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def test_permission_policy_async(app, create_record, superusers_role_need):
+    class AsyncPolicy(BasePermissionPolicy):
+        can_read = [AnyUserIfPublic(), RecordOwners(), Admin()]
+        can_update = [RecordOwners()]
+
+    record = create_record({"owners": [1]})
+    identity = Identity(1)
+    identity.provides.add(UserNeed(1))
+
+    async def check(policy, executor):
+        return await policy.aallows(identity, executor=executor)
+
+    executor = InlineExecutor()
+    policy = AsyncPolicy(action="read", record=record)
+    assert asyncio.run(check(policy, executor))
+    assert policy.needs == {superusers_role_need, any_user, UserNeed(1)}
+    # needs and excludes of the 2 dynamic generators, 2 ActionNeed expansions
+    assert executor.calls == 6
+
+    g.identity = Identity(2)
+    policy = AsyncPolicy(action="update", record=record)
+    assert not asyncio.run(policy.acan(executor=executor))
+
+    policy = AsyncPolicy(action="read", identity=identity)
+    filters = asyncio.run(policy.aquery_filters(executor=executor))
+    assert filters == policy.query_filters
+
+
+class RequestOwner(Generator):
+    """Generator reading the request and ``g``."""
+
+    def needs(self, **kwargs):
+        owner = int(request.args["owner"])
+        return [UserNeed(owner)] if g.identity.id == owner else []
+
+
+def test_permission_policy_async_contexts(app):
+    class AsyncPolicy(BasePermissionPolicy):
+        can_read = [RequestOwner()]
+
+    identity = Identity(1)
+    identity.provides.add(UserNeed(1))
+
+    async def check(policy):
+        return await policy.aallows(identity, executor=InlineExecutor())
+
+    for owner in (1, 2):
+        with app.test_request_context("/?owner={}".format(owner)):
+            g.identity = identity
+            expected = AsyncPolicy(action="read").allows(identity)
+            assert asyncio.run(check(AsyncPolicy(action="read"))) == expected
+            assert expected == (owner == 1)
+            # The generators run in a copy of g
+            assert g.identity is identity
+
+
+def test_normalize_query_filters():
+    term_a1 = dsl.Q("term", fieldA="valueA")
+
+    # match_all absorbs the disjunction
+    assert normalize_query_filters([term_a1, dsl.Q("match_all")]) == dsl.Q()
+    # match_none is dropped
+    assert normalize_query_filters([~dsl.Q("match_all"), term_a1]) == term_a1
+    assert normalize_query_filters([~dsl.Q("match_all")]) == dsl.Q("match_none")
+    assert normalize_query_filters([]) == dsl.Q("match_none")
+    # duplicates are removed and terms on the same field merged
+    query = normalize_query_filters(
+        [
+            term_a1,
+            dsl.Q("term", fieldA="valueA"),
+            dsl.Q("term", fieldA="valueB") | dsl.Q("terms", fieldA=["valueC", 1]),
+            dsl.Q("term", fieldB=True),
+            dsl.Q("term", fieldB=1),
+            dsl.Q("term", object={"scheme": "person", "id": 1}),
+            dsl.Q("term", object={"scheme": "person", "id": 1}),
+        ]
+    )
+    assert query.to_dict() == {
+        "bool": {
+            "should": [
+                {"terms": {"fieldA": ["valueA", "valueB", "valueC", 1]}},
+                {"terms": {"fieldB": [True, 1]}},
+                {"term": {"object": {"scheme": "person", "id": 1}}},
+            ]
+        }
+    }
+
+
+def test_permission_filter_cache(app, superuser_identity, count_queries):
+    cache = app.extensions["invenio-records-permissions"].filter_cache
+    cache.clear()
+    hits, misses = cache.hits, cache.misses
+
+    anonymous = Identity(None)
+    anonymous.provides.add(any_user)
+    other_anonymous = Identity(None)
+    other_anonymous.provides.add(any_user)
+
+    query = permission_filter(TestPermissionPolicy(action="random", identity=anonymous))
+    assert query == dsl.Q("match_none")
+    with count_queries() as queries:
+        permission = TestPermissionPolicy(action="random", identity=other_anonymous)
+        assert permission_filter(permission) == query
+    assert queries == []
+    assert (cache.hits - hits, cache.misses - misses) == (1, 1)
+
+    # Other identities, actions or arguments have their own filters
+    permission = TestPermissionPolicy(action="random", identity=superuser_identity)
+    assert permission_filter(permission) == dsl.Q()
+    permission = TestPermissionPolicy(action="read", identity=anonymous)
+    assert permission_filter(permission) == dsl.Q()
+    permission = TestPermissionPolicy(action="random", identity=anonymous, record={})
+    assert permission_filter(permission) == dsl.Q("match_none")
+    assert len(cache) == 3
+
+
+def test_permission_filter_cache_shared(app, db, superusers_role, superuser_identity):
+    ext = app.extensions["invenio-records-permissions"]
+    # Another worker sharing the grants version file
+    other_app = Flask("other")
+    other_app.config["RECORDS_PERMISSIONS_GRANTS_VERSION_FILE"] = app.config[
+        "RECORDS_PERMISSIONS_GRANTS_VERSION_FILE"
+    ]
+    other = InvenioRecordsPermissions(other_app)
+
+    permission = TestPermissionPolicy(action="random", identity=superuser_identity)
+    query = permission_filter(permission)
+    assert query == dsl.Q()
+    key, cached = next(iter(ext.filter_cache._data.items()))
+    other.filter_cache.set(key, cached[0])
+
+    # Revoking superuser-access in this app clears the cache of the other one
+    db.session.delete(ActionRoles.query.filter_by(role=superusers_role).one())
+    db.session.commit()
+    permission = TestPermissionPolicy(action="random", identity=superuser_identity)
+    assert permission_filter(permission) == dsl.Q("match_none")
+    assert other.filter_cache.get(key) is None
+
+
+def test_permission_policy_decision_cache(app, db, mocker, monkeypatch):
+    ext = app.extensions["invenio-records-permissions"]
+    monkeypatch.setattr(ext, "decision_cache", TTLCache(maxsize=10))
+    record = Record.create({"owners": [1], "_access": {"metadata_restricted": True}})
+    owner = Identity(1)
+    owner.provides.add(UserNeed(1))
+    other = Identity(2)
+    other.provides.add(UserNeed(2))
+
+    spy = mocker.spy(RecordOwners, "needs")
+    assert RecordPermissionPolicy(action="read", record=record).allows(owner)
+    assert RecordPermissionPolicy(action="read", record=record).allows(owner)
+    assert not RecordPermissionPolicy(action="read", record=record).allows(other)
+    assert spy.call_count == 2
+    assert len(ext.decision_cache) == 2
+
+    # A new revision of the record is checked again
+    record["owners"] = [2]
+    record.commit()
+    assert not RecordPermissionPolicy(action="read", record=record).allows(owner)
+    assert RecordPermissionPolicy(action="read", record=record).allows(other)
+    assert spy.call_count == 4
+
+    # Policies over other arguments are not cached
+    policy = RecordPermissionPolicy(action="read", record=record, community="c")
+    assert policy.allows(other)
+    assert spy.call_count == 5
+
+    # Unless over the checked identity
+    policy = RecordPermissionPolicy(action="read", record=record, identity=other)
+    assert policy.allows(other)
+    assert spy.call_count == 5
+    policy = RecordPermissionPolicy(action="read", record=record, identity=owner)
+    assert policy.allows(other)
+    assert spy.call_count == 6
+
+    # Drafts share the ids and revision ids of the records
+    class Draft(Record):
+        pass
+
+    draft = Draft({"owners": [1]}, model=record.model)
+    assert not RecordPermissionPolicy(action="read", record=draft).allows(other)
+    assert spy.call_count == 7
+
+
+def test_filter_allowed(app, superusers_role, mocker):
+    consumed = []
+
+    def records():
+        for i in itertools.count():
+            consumed.append(i)
+            restricted = i % 3 != 0
+            yield {"id": i, "_access": {"metadata_restricted": restricted}}
+
+    identity = Identity(1)
+    identity.provides.add(any_user)
+    spy = mocker.spy(RecordPermissionPolicy, "bulk_can")
+
+    allowed = filter_allowed(
+        RecordPermissionPolicy, "read", identity, records(), chunk_size=4
+    )
+    first = list(itertools.islice(allowed, 3))
+    assert [record["id"] for record in first] == [0, 3, 6]
+    # The records are consumed chunk by chunk
+    assert len(consumed) == 8
+    assert spy.call_count == 2
+
+    allowed = filter_allowed(RecordPermissionPolicy, "read", identity, [])
+    assert list(allowed) == []
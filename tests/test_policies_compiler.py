@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Compiled policies tests."""
+
+import pytest
+from flask_principal import ActionNeed, Identity, RoleNeed, UserNeed
+from invenio_access.models import ActionRoles
+from invenio_access.permissions import any_user, authenticated_user, system_process
+from invenio_accounts.models import Role
+
+from invenio_records_permissions.generators import (
+    Admin,
+    AllowedByAccessLevel,
+    AnyUser,
+    AnyUserIfPublic,
+    AuthenticatedUser,
+    Disable,
+    RecordOwners,
+    SystemProcess,
+)
+from invenio_records_permissions.policies import (
+    BasePermissionPolicy,
+    RecordPermissionPolicy,
+    compile_policy,
+)
+
+
+class ExamplePolicy(RecordPermissionPolicy):
+    can_read = [AnyUserIfPublic(), RecordOwners(), AllowedByAccessLevel()]
+    can_update = [RecordOwners(), Admin()]
+    can_search = [AuthenticatedUser(), SystemProcess()]
+    can_disabled = [AnyUser(), Disable()]
+    can_nobody = []
+
+
+def _identity(*needs):
+    identity = Identity(1)
+    identity.provides.update(needs)
+    return identity
+
+
+@pytest.fixture()
+def identities(superusers_role_need):
+    return [
+        _identity(),
+        _identity(any_user),
+        _identity(any_user, authenticated_user, UserNeed(1)),
+        _identity(any_user, authenticated_user, UserNeed(4)),
+        _identity(any_user, authenticated_user, UserNeed(5)),
+        _identity(any_user, system_process),
+        _identity(any_user, superusers_role_need),
+    ]
+
+
+@pytest.fixture()
+def records(create_record):
+    return [
+        create_record(),
+        create_record({"owners": [4], "_access": {"metadata_restricted": True}}),
+        create_record(
+            {
+                "owners": [],
+                "_access": {"metadata_restricted": True},
+                "internal": {
+                    "access_levels": {
+                        "metadata_curator": [{"scheme": "person", "id": 5}]
+                    }
+                },
+            }
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "action", ["read", "update", "search", "disabled", "nobody", "random"]
+)
+def test_compiled_policy_matches_policy(action, db, identities, records):
+    # Allow and deny grants through an ActionNeed
+    admins, blocked = Role(name="admins"), Role(name="blocked")
+    db.session.add_all([admins, blocked])
+    db.session.add(ActionRoles.allow(ActionNeed("admin-access"), role=admins))
+    db.session.add(ActionRoles.deny(ActionNeed("admin-access"), role=blocked))
+    db.session.commit()
+    identities += [
+        _identity(any_user, UserNeed(4), RoleNeed("admins")),
+        _identity(any_user, UserNeed(4), RoleNeed("blocked")),
+        _identity(any_user, RoleNeed("admins"), RoleNeed("blocked")),
+    ]
+    compiled = compile_policy(ExamplePolicy)
+
+    for identity in identities:
+        for record in records:
+            policy = ExamplePolicy(action, record=record)
+            # Computes all needs and excludes, without short-circuit
+            policy.excludes
+            expected = policy.allows(identity)
+            assert ExamplePolicy(action, record=record).allows(identity) == expected
+            assert compiled[action](identity, record=record) == expected
+            assert compiled.allows(action, identity, record=record) == expected
+
+
+def test_compile_policy_actions():
+    compiled = compile_policy(ExamplePolicy)
+    assert {"read", "update", "search", "disabled", "nobody", "delete"} <= set(
+        compiled._actions
+    )
+
+    compiled = compile_policy(ExamplePolicy, actions=["read"])
+    assert set(compiled._actions) == {"read"}
+    # Labels are resolved by the policy
+    assert compiled["bucket-read"].action == "read_files"
+
+
+def test_compiled_action_static_needs():
+    compiled = compile_policy(BasePermissionPolicy)
+
+    assert compiled["random"].excludes == {any_user}
+    assert compiled["random"].generators == ()
+    assert compiled["read"].needs == set()
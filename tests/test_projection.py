@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+import uuid
+
+from conftest import PublicIfNotEmbargoed, RecordCreators
+from flask_principal import Identity, UserNeed
+from invenio_access.permissions import any_user
+from invenio_records.api import Record
+
+from invenio_records_permissions.generators import (
+    Admin,
+    AllowedByAccessLevel,
+    AnyUserIfPublic,
+    Generator,
+    RecordOwners,
+)
+from invenio_records_permissions.policies import BasePermissionPolicy
+from invenio_records_permissions.projection import project, query_projections
+
+
+class ProjectedPolicy(BasePermissionPolicy):
+    can_read = [AnyUserIfPublic(), RecordOwners(), AllowedByAccessLevel(), Admin()]
+    can_update = [RecordOwners(), Generator()]
+
+
+def test_record_paths():
+    assert ProjectedPolicy.record_paths("read") == {
+        "owners",
+        "_access.metadata_restricted",
+        "internal.access_levels",
+    }
+    assert ProjectedPolicy.record_paths("create") == set()
+    # Generator does not declare the paths it reads
+    assert ProjectedPolicy.record_paths("update") is None
+
+
+def test_record_paths_subclass():
+    # The paths of the parent do not describe the new needs
+    assert PublicIfNotEmbargoed.record_paths is None
+    assert RecordCreators.record_paths is None
+
+    class Policy(BasePermissionPolicy):
+        can_read = [PublicIfNotEmbargoed()]
+
+    assert Policy.record_paths("read") is None
+
+
+def test_project(create_record):
+    record = create_record({"owners": [1]})
+
+    assert project(record, ProjectedPolicy.record_paths("read")) == {
+        "owners": [1],
+        "_access": {"metadata_restricted": False},
+        "internal": {"access_levels": {}},
+    }
+    assert project(record, ["missing", "title.missing"]) == {}
+
+
+def test_query_projections(create_record, db, superusers_role):
+    public = Record.create(create_record({"owners": [2]}))
+    restricted = Record.create(
+        create_record({"owners": [1], "_access": {"metadata_restricted": True}})
+    )
+    other = Record.create(
+        create_record({"owners": [2], "_access": {"metadata_restricted": True}})
+    )
+    db.session.commit()
+
+    paths = ProjectedPolicy.record_paths("read")
+    ids = [other.id, public.id, uuid.uuid4(), restricted.id]
+    projections = query_projections(paths, ids)
+    assert projections == [project(r, paths) for r in (other, public, restricted)]
+    assert "title" not in projections[0]
+
+    identity = Identity(1)
+    identity.provides.update({any_user, UserNeed(1)})
+    assert ProjectedPolicy.bulk_can("read", identity, projections) == [
+        False,
+        True,
+        True,
+    ]
+
+    # Deleted records are skipped, as they are not public
+    restricted.delete()
+    db.session.commit()
+    assert query_projections(paths, ids) == projections[:2]
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019-2020 CERN.
+# Copyright (C) 2019-2020 Northwestern University.
+#
+# Invenio-Records-Permissions is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+"""Tracing tests."""
+
+import pytest
+from flask import Flask
+from flask_principal import Identity, UserNeed
+from invenio_access.permissions import any_user
+
+from invenio_records_permissions import InvenioRecordsPermissions, tracing
+from invenio_records_permissions.generators import (
+    Admin,
+    AnyUserIfPublic,
+    RecordOwners,
+    SystemProcessWithoutAdmin,
+)
+from invenio_records_permissions.policies import BasePermissionPolicy
+
+
+class TracedPolicy(BasePermissionPolicy):
+    can_read = [AnyUserIfPublic(), RecordOwners(), Admin()]
+    can_search = [SystemProcessWithoutAdmin()]
+
+
+@pytest.fixture()
+def events(app, monkeypatch):
+    events = []
+
+    def tracer(event, duration, queries=0, **info):
+        assert duration >= 0
+        events.append(dict(event=event, queries=queries, **info))
+
+    ext = app.extensions["invenio-records-permissions"]
+    monkeypatch.setattr(ext, "tracer", tracer)
+    monkeypatch.setattr(tracing, "_enabled", False)
+    tracing.enable()
+    return events
+
+
+def test_init_tracer():
+    app = Flask("testapp")
+    ext = InvenioRecordsPermissions(app)
+    assert ext.tracer is None
+
+    app = Flask("testapp")
+    app.config["RECORDS_PERMISSIONS_TRACER"] = "builtins.print"
+    ext = InvenioRecordsPermissions(app)
+    assert ext.tracer is print
+
+
+def test_trace_allows(events, create_record, superusers_role):
+    identity = Identity(1)
+    identity.provides.update({any_user, UserNeed(1)})
+    record = create_record({"_access": {"metadata_restricted": True}})
+
+    assert TracedPolicy(action="read", record=record).allows(identity)
+
+    assert events[-1]["event"] == "allows"
+    assert events[-1]["policy"] is TracedPolicy
+    assert events[-1]["action"] == "read"
+    # superuser-access and admin-access are expanded from the database
+    expansions = [e for e in events if e["event"] == "expand_action"]
+    assert len(expansions) == 2
+    assert all(e["queries"] > 0 for e in expansions)
+    assert events[-1]["queries"] == sum(e["queries"] for e in expansions)
+    generators = [
+        (type(e["generator"]), e["method"]) for e in events if "generator" in e
+    ]
+    assert (AnyUserIfPublic, "needs") in generators
+    assert (RecordOwners, "needs") in generators
+
+
+def test_trace_needs_excludes(events, superusers_role):
+    policy = TracedPolicy(action="search")
+    policy.needs
+    policy.excludes
+
+    assert [e["event"] for e in events] == [
+        "generator",
+        "generator",
+        "expand_action",
+        "load_permissions",
+        "needs",
+        "excludes",
+    ]
+    excludes = events[1]
+    assert excludes["method"] == "excludes"
+    assert isinstance(excludes["generator"], SystemProcessWithoutAdmin)
+    # superuser-access is expanded from the database
+    assert excludes["queries"] > 0
+    # load_permissions includes the expansion
+    assert events[4]["queries"] == sum(events[i]["queries"] for i in (0, 1, 3))
+    assert events[5]["queries"] == 0
+
+
+def test_trace_query_filters(events):
+    identity = Identity(1)
+    identity.provides.add(any_user)
+    TracedPolicy(action="read", identity=identity).query_filters
+
+    assert [e["event"] for e in events] == [
+        "generator",
+        "generator",
+        "generator",
+        "expand_action",
+        "query_filters",
+    ]
+    assert {e["method"] for e in events[:3]} == {"query_filter"}
+
+
+def test_no_tracer(app, events, create_record, monkeypatch):
+    # Tracing is enabled but not for this application
+    monkeypatch.setattr(app.extensions["invenio-records-permissions"], "tracer", None)
+    TracedPolicy(action="read", record=create_record()).allows(Identity(1))
+    assert events == []